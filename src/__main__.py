@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Modules in this package import each other by plain name, as when running src/main.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,35 +2,27 @@ from operation import Operation
 
 # ALU class to perform arithmetic and logical operations
 class ALU:
+    # Dispatch table mapping each operation to its 32-bit result function
+    OPERATIONS = {
+        Operation.ADD: lambda operand1, operand2: (operand1 + operand2) & 0xFFFFFFFF,
+        Operation.SUB: lambda operand1, operand2: (operand1 - operand2) & 0xFFFFFFFF,
+        Operation.MOV: lambda operand1, operand2: operand2 & 0xFFFFFFFF,
+        Operation.AND: lambda operand1, operand2: (operand1 & operand2) & 0xFFFFFFFF,
+        Operation.OR: lambda operand1, operand2: (operand1 | operand2) & 0xFFFFFFFF,
+        Operation.XOR: lambda operand1, operand2: (operand1 ^ operand2) & 0xFFFFFFFF,
+        Operation.NOT: lambda operand1, operand2: (~operand1) & 0xFFFFFFFF,
+        Operation.SHL: lambda operand1, operand2: (operand1 << operand2) & 0xFFFFFFFF,
+        Operation.SHR: lambda operand1, operand2: (operand1 >> operand2) & 0xFFFFFFFF,
+        Operation.ROL: lambda operand1, operand2: ((operand1 << operand2) | (operand1 >> (32 - operand2))) & 0xFFFFFFFF,
+        Operation.ROR: lambda operand1, operand2: ((operand1 >> operand2) | (operand1 << (32 - operand2))) & 0xFFFFFFFF,
+        Operation.INC: lambda operand1, operand2: (operand1 + 1) & 0xFFFFFFFF,
+        Operation.DEC: lambda operand1, operand2: (operand1 - 1) & 0xFFFFFFFF,
+        Operation.CMP: lambda operand1, operand2: (operand1 - operand2) & 0xFFFFFFFF,
+    }
+
     def execute(self, op, operand1, operand2):
         """Execute the specified ALU operation, ensuring 32-bit results."""
-        if op == Operation.ADD:
-            return (operand1 + operand2) & 0xFFFFFFFF
-        elif op == Operation.SUB:
-            return (operand1 - operand2) & 0xFFFFFFFF
-        elif op == Operation.MOV:
-            return operand2 & 0xFFFFFFFF
-        elif op == Operation.AND:
-            return (operand1 & operand2) & 0xFFFFFFFF
-        elif op == Operation.OR:
-            return (operand1 | operand2) & 0xFFFFFFFF
-        elif op == Operation.XOR:
-            return (operand1 ^ operand2) & 0xFFFFFFFF
-        elif op == Operation.NOT:
-            return (~operand1) & 0xFFFFFFFF
-        elif op == Operation.SHL:
-            return (operand1 << operand2) & 0xFFFFFFFF
-        elif op == Operation.SHR:
-            return (operand1 >> operand2) & 0xFFFFFFFF
-        elif op == Operation.ROL:
-            return ((operand1 << operand2) | (operand1 >> (32 - operand2))) & 0xFFFFFFFF
-        elif op == Operation.ROR:
-            return ((operand1 >> operand2) | (operand1 << (32 - operand2))) & 0xFFFFFFFF
-        elif op == Operation.INC:
-            return (operand1 + 1) & 0xFFFFFFFF
-        elif op == Operation.DEC:
-            return (operand1 - 1) & 0xFFFFFFFF
-        elif op == Operation.CMP:
-            return (operand1 - operand2) & 0xFFFFFFFF
-        else:
+        handler = self.OPERATIONS.get(op)
+        if handler is None:
             raise ValueError(f"Operation {op} is not supported")
+        return handler(operand1, operand2)
@@ -0,0 +1,231 @@
+from operation import Operation
+from program import Program, DecodedInstruction
+from microcode import compile_plan
+from array import array
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+
+# Object file layout (little-endian):
+#   header   OBJECT_HEADER, then the comma-separated opcode names the op numbers refer to
+#   records  one INSTRUCTION per instruction, with operands already resolved
+#   labels   one LABEL per label
+#   lines    one uint32 source line number per instruction
+#   strings  one uint32 byte length per string, then the UTF-8 strings back to back
+OBJECT_MAGIC = b"POBJ"
+OBJECT_VERSION = 1
+OBJECT_HEADER = struct.Struct("<4sH32sIIIIH")  # magic, version, source SHA-256, instructions, labels, strings, string bytes, opcode names length
+INSTRUCTION = struct.Struct("<BHBBBIIIIIIqqq")  # op, flags, dest/src1/src2 slots, text/dest/src1/src2/fault strings, target, src1/src2/dest immediates
+LABEL = struct.Struct("<II")  # name string, instruction index
+OBJECT_SUFFIX = ".pobj"
+SEEN_SUFFIX = ".seen"  # Empty marker left by the first load of a source; its object is written on the next load
+CACHE_MAX_ENTRIES = 256  # Objects and markers kept; the least recently used beyond this are pruned
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # Total size kept, pruned the same way
+NO_STRING = 0xFFFFFFFF
+NO_SLOT = 0xFF
+NOT_DECODED = 0xFF  # op of an instruction whose decode failed (fault string holds the error) or that decoded to nothing
+REDECODE = 0xFE  # op of an instruction whose immediates do not fit the record; it is decoded from its text on load
+
+# Record flags: which optional fields are present
+SRC1_REG, SRC2_REG, SRC1_IMM, SRC2_IMM, DEST_IMM, TARGET = 1, 2, 4, 8, 16, 32
+
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+OPCODES = list(Operation)
+OPCODE_NAMES = ",".join(op.name for op in Operation).encode()
+
+def source_hash(source):
+    """Return the SHA-256 digest of a program source, the key of its object."""
+    return hashlib.sha256(source.encode()).digest()
+
+def default_cache_dir():
+    """Return the object cache directory: $PENTAUR_CACHE_DIR, or pentaur/objects under the user cache directory."""
+    directory = os.environ.get("PENTAUR_CACHE_DIR")
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pentaur", "objects")
+
+def assemble(program):
+    """Encode a decoded Program as object bytes."""
+    strings = []
+    indexes = {}
+    def string(value):
+        if value is None:
+            return NO_STRING
+        index = indexes.get(value)
+        if index is None:
+            index = indexes[value] = len(strings)
+            strings.append(value)
+        return index
+    def slot(value):
+        return NO_SLOT if value is None else value
+    opcodes = {op: number for number, op in enumerate(OPCODES)}
+    records = bytearray()
+    for index, text in enumerate(program.instructions):
+        decoded = program.decoded[index]
+        if decoded is None:
+            records += INSTRUCTION.pack(NOT_DECODED, 0, NO_SLOT, NO_SLOT, NO_SLOT, string(text), NO_STRING, NO_STRING, NO_STRING,
+                                        string(program.errors.get(index)), 0, 0, 0, 0)
+            continue
+        immediates = (decoded.src1_imm, decoded.src2_imm, decoded.dest_imm)
+        if any(value is not None and not INT64_MIN <= value <= INT64_MAX for value in immediates):
+            records += INSTRUCTION.pack(REDECODE, 0, NO_SLOT, NO_SLOT, NO_SLOT, string(text), NO_STRING, NO_STRING, NO_STRING, NO_STRING, 0, 0, 0, 0)
+            continue
+        flags = ((SRC1_REG if decoded.src1_reg is not None else 0) | (SRC2_REG if decoded.src2_reg is not None else 0)
+                 | (SRC1_IMM if decoded.src1_imm is not None else 0) | (SRC2_IMM if decoded.src2_imm is not None else 0)
+                 | (DEST_IMM if decoded.dest_imm is not None else 0) | (TARGET if decoded.target is not None else 0))
+        records += INSTRUCTION.pack(opcodes[decoded.op], flags, slot(decoded.dest_slot), slot(decoded.src1_slot), slot(decoded.src2_slot),
+                                    string(decoded.text), string(decoded.dest), string(decoded.src1), string(decoded.src2), string(decoded.fault),
+                                    decoded.target or 0, decoded.src1_imm or 0, decoded.src2_imm or 0, decoded.dest_imm or 0)
+    labels = b"".join(LABEL.pack(string(name), index) for name, index in program.labels.items())
+    encoded = [value.encode() for value in strings]
+    header = OBJECT_HEADER.pack(OBJECT_MAGIC, OBJECT_VERSION, source_hash(program.source), len(program.instructions), len(program.labels),
+                                len(encoded), sum(len(value) for value in encoded), len(OPCODE_NAMES))
+    return b"".join([header, OPCODE_NAMES, bytes(records), labels, array("I", program.lines).tobytes(),
+                     array("I", [len(value) for value in encoded]).tobytes(), *encoded])
+
+def load_object(data, source, control_unit):
+    """Rebuild the decoded Program of source from object bytes without parsing it; raises ValueError if they do not match."""
+    if len(data) < OBJECT_HEADER.size:
+        raise ValueError("Object is truncated")
+    magic, version, digest, count, label_count, string_count, string_bytes, names_length = OBJECT_HEADER.unpack_from(data)
+    if magic != OBJECT_MAGIC or version != OBJECT_VERSION:
+        raise ValueError(f"Not a version {OBJECT_VERSION} object")
+    if digest != source_hash(source):
+        raise ValueError("Object was assembled from a different source")
+    offset = OBJECT_HEADER.size
+    if data[offset:offset + names_length] != OPCODE_NAMES:
+        raise ValueError("Object was assembled for a different instruction set")
+    offset += names_length
+    records_offset = offset
+    offset += count * INSTRUCTION.size
+    labels_offset = offset
+    offset += label_count * LABEL.size
+    lines = array("I", data[offset:offset + count * 4]).tolist()
+    offset += count * 4
+    lengths = array("I", data[offset:offset + string_count * 4])
+    offset += string_count * 4
+    if len(data) != offset + string_bytes or len(lines) != count or len(lengths) != string_count:
+        raise ValueError("Object is truncated")
+    strings = []
+    for length in lengths:
+        strings.append(data[offset:offset + length].decode())
+        offset += length
+    def string(index):
+        return None if index == NO_STRING else strings[index]
+    labels = {strings[name]: index for name, index in LABEL.iter_unpack(data[labels_offset:labels_offset + label_count * LABEL.size])}
+    records = list(INSTRUCTION.iter_unpack(data[records_offset:records_offset + count * INSTRUCTION.size]))
+    program = Program(source, ([strings[record[5]] for record in records], labels, lines))
+    control_unit.labels = labels
+    for index, (op, flags, dest_slot, src1_slot, src2_slot, text, dest, src1, src2, fault, target, src1_imm, src2_imm, dest_imm) in enumerate(records):
+        if op == NOT_DECODED:
+            program.decoded.append(None)
+            if fault != NO_STRING:
+                program.errors[index] = strings[fault]
+            continue
+        if op == REDECODE:
+            try:
+                program.decoded.append(control_unit.decode(strings[text]))
+            except ValueError as e:
+                program.decoded.append(None)
+                program.errors[index] = str(e)
+            continue
+        decoded = DecodedInstruction(strings[text], OPCODES[op], string(dest), string(src1), string(src2))
+        if flags & SRC1_REG:
+            decoded.src1_reg = decoded.src1
+        if flags & SRC2_REG:
+            decoded.src2_reg = decoded.src2
+        if flags & SRC1_IMM:
+            decoded.src1_imm = src1_imm
+        if flags & SRC2_IMM:
+            decoded.src2_imm = src2_imm
+        if flags & DEST_IMM:
+            decoded.dest_imm = dest_imm
+        if flags & TARGET:
+            decoded.target = target
+        decoded.fault = string(fault)
+        decoded.dest_slot = None if dest_slot == NO_SLOT else dest_slot
+        decoded.src1_slot = None if src1_slot == NO_SLOT else src1_slot
+        decoded.src2_slot = None if src2_slot == NO_SLOT else src2_slot
+        decoded.plan = compile_plan(control_unit, decoded)
+        program.decoded.append(decoded)
+    return program
+
+# Directory of assembled objects named by the SHA-256 of their source, pruned least recently used first
+class ObjectCache:
+    def __init__(self, directory=None, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, source):
+        """Return the object file path for a source."""
+        return os.path.join(self.directory, source_hash(source).hex() + OBJECT_SUFFIX)
+
+    def load(self, source, control_unit):
+        """Return the cached Program for source decoded for control_unit, or None if there is no usable object."""
+        path = self.path(source)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            program = load_object(data, source, control_unit)
+        except (ValueError, IndexError, struct.error, UnicodeDecodeError) as e:
+            # Stale or damaged objects are simply assembled again
+            logging.info("Ignoring object %s: %s", path, str(e))
+            self.misses += 1
+            return None
+        self.hits += 1
+        try:
+            os.utime(path)  # The modification time orders objects for pruning
+        except OSError:
+            pass
+        return program
+
+    def store(self, program):
+        """Write the object of a decoded Program loaded before; a first load only leaves a marker. Failures only cost the cache."""
+        path = self.path(program.source)
+        seen = path[:-len(OBJECT_SUFFIX)] + SEEN_SUFFIX
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if not os.path.exists(seen):
+                # Assembling costs more than it saves for a program that is never loaded again
+                open(seen, "wb").close()
+            else:
+                # Write then rename, so concurrent batch workers never read a partial object
+                fd, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+                with os.fdopen(fd, "wb") as f:
+                    f.write(assemble(program))
+                os.replace(temporary, path)
+                os.remove(seen)
+            self.prune()
+        except OSError as e:
+            logging.warning("Could not write object cache %s: %s", path, str(e))
+
+    def prune(self):
+        """Delete the least recently used objects and markers beyond max_entries or max_bytes."""
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith((OBJECT_SUFFIX, SEEN_SUFFIX)):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue  # Pruned by another process meanwhile
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort(reverse=True)
+        total = 0
+        for kept, (mtime, size, path) in enumerate(entries):
+            total += size
+            if kept >= self.max_entries or total > self.max_bytes:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
@@ -0,0 +1,55 @@
+from runner import Runner, DEFAULT_MAX_INSTRUCTIONS
+from assembler import ObjectCache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import glob
+import os
+import time
+
+PROGRAM_EXTENSIONS = (".asm", ".txt")
+
+def collect_programs(paths):
+    """Expand directories, glob patterns and file names into a sorted, de-duplicated list of programs."""
+    programs = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [os.path.join(path, name) for name in os.listdir(path)
+                       if name.lower().endswith(PROGRAM_EXTENSIONS) and os.path.isfile(os.path.join(path, name))]
+        elif glob.has_magic(path):
+            matches = [match for match in glob.glob(path, recursive=True)
+                       if match.lower().endswith(PROGRAM_EXTENSIONS) and os.path.isfile(match)]
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            raise ValueError(f"No such program, directory or pattern: {path}")
+        programs.extend(sorted(matches))
+    return list(dict.fromkeys(programs))
+
+def run_program(path, engine="control", max_instructions=DEFAULT_MAX_INSTRUCTIONS, time_limit=None, include_state=False, cache_dir=None):
+    """Run one program in a worker process and return its JSON-serializable result; cache_dir holds assembled objects, None disables them."""
+    start = time.perf_counter()
+    result = {"program": path}
+    try:
+        with open(path, "r") as f:
+            source = f.read()
+        object_cache = ObjectCache(cache_dir) if cache_dir is not None else None
+        runner = Runner(source, engine=engine, max_instructions=max_instructions, time_limit=time_limit, object_cache=object_cache)
+        runner.run()
+        state = runner.machine_state()
+        result.update(status=state["status"], executed=state["executed"], errors=state["errors"])
+        if include_state:
+            result["state"] = {key: state[key] for key in ("registers", "segments", "flags", "ports", "memory")}
+    except (OSError, ValueError) as e:
+        result.update(status="failed", executed=0, errors=[{"error": str(e)}])
+    result["elapsed"] = round(time.perf_counter() - start, 6)
+    return result
+
+def run_batch(programs, engine="control", max_instructions=DEFAULT_MAX_INSTRUCTIONS, time_limit=None, jobs=None, include_state=False, cache_dir=None):
+    """Run programs across a process pool, yielding each result as soon as it completes."""
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(run_program, path, engine, max_instructions, time_limit, include_state, cache_dir): path for path in programs}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # A crashed worker is reported like any other failing program
+                yield {"program": futures[future], "status": "failed", "executed": 0, "errors": [{"error": f"{type(e).__name__}: {str(e)}"}], "elapsed": None}
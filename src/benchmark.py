@@ -0,0 +1,178 @@
+from runner import Runner, ENGINES
+import glob
+import os
+import platform
+import time
+import tracemalloc
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples")
+EXAMPLE_REPEATS = 500  # The bundled examples are tiny, so each measurement runs them this many times
+
+def dec_loop(scale):
+    """Tight DEC/CMP/JNE countdown loop."""
+    return f"""
+MOV R1, {int(30000 * scale)}
+loop: DEC R1, R1
+CMP R1, 0
+JNE loop
+"""
+
+def memory_sweep(scale):
+    """STORE/LOAD sweep over 64 words, repeated."""
+    body = "\n".join(f"STORE R2, {offset}\nLOAD R3, {offset}\nADD R2, R3, 1" for offset in range(0, 256, 4))
+    return f"""
+MOVSEG DS, 0x1000
+MOV R1, {int(500 * scale)}
+MOV R2, 0
+loop: {body}
+DEC R1, R1
+CMP R1, 0
+JNE loop
+"""
+
+def stack_churn(scale):
+    """PUSH/POP pairs moving values through the stack."""
+    return f"""
+MOVSEG SS, 0x8000
+MOV SP, 0x1000
+MOV R1, {int(12000 * scale)}
+loop: PUSH R1
+PUSH 7
+POP R2
+POP R3
+ADD R4, R2, R3
+DEC R1, R1
+CMP R1, 0
+JNE loop
+"""
+
+def shift_rotate(scale):
+    """Shift- and rotate-heavy arithmetic."""
+    return f"""
+MOV R1, {int(10000 * scale)}
+MOV R2, 0x12345678
+loop: SHL R3, R2, 3
+SHR R4, R2, 5
+ROL R2, R2, 7
+ROR R5, R3, 11
+XOR R2, R2, R4
+DEC R1, R1
+CMP R1, 0
+JNE loop
+"""
+
+WORKLOADS = {
+    "dec_loop": dec_loop,
+    "memory_sweep": memory_sweep,
+    "stack_churn": stack_churn,
+    "shift_rotate": shift_rotate,
+}
+
+def example_workloads():
+    """Return {"example:<name>": path} for the bundled example programs."""
+    paths = sorted(glob.glob(os.path.join(EXAMPLES_DIR, "*.asm")) + glob.glob(os.path.join(EXAMPLES_DIR, "*.txt")))
+    return {f"example:{os.path.basename(path)}": path for path in paths}
+
+def workload_names():
+    """Return every available workload name."""
+    return list(WORKLOADS) + list(example_workloads())
+
+def workload_source(name, scale=1.0):
+    """Return (source, repeats) for a workload; examples are repeated to get measurable times."""
+    if name in WORKLOADS:
+        return WORKLOADS[name](scale), 1
+    examples = example_workloads()
+    if name not in examples:
+        raise ValueError(f"Unknown workload {name} (choose from {', '.join(workload_names())})")
+    with open(examples[name], "r") as f:
+        return f.read(), max(1, int(EXAMPLE_REPEATS * scale))
+
+def _run(source, engine, repeats):
+    """Run source repeats times on fresh machines; returns the instructions executed."""
+    executed = 0
+    for _ in range(repeats):
+        runner = Runner(source, engine=engine)
+        runner.run()
+        executed += runner.executed
+    return executed
+
+def measure(name, engine, scale=1.0, repeat=3):
+    """Benchmark one workload on one engine: best-of-repeat time, instructions/second and peak memory."""
+    source, repeats = workload_source(name, scale)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        executed = _run(source, engine, repeats)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    # Peak memory is measured in a separate run because tracing allocations slows execution
+    tracemalloc.start()
+    try:
+        _run(source, engine, repeats)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "workload": name,
+        "engine": engine,
+        "instructions": executed,
+        "seconds": round(best, 6),
+        "ips": round(executed / best) if best > 0 else None,
+        "peak_bytes": peak,
+    }
+
+def run_benchmarks(workloads=None, engines=ENGINES, scale=1.0, repeat=3, progress=None):
+    """Benchmark every workload on every engine and return a JSON-serializable results document."""
+    results = []
+    for name in workloads or workload_names():
+        for engine in engines:
+            result = measure(name, engine, scale, repeat)
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "scale": scale,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare_results(baseline, current):
+    """Pair results by workload and engine, returning rows with the relative change in speed and memory."""
+    previous = {(result["workload"], result["engine"]): result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        old = previous.get((result["workload"], result["engine"]))
+        if old is None or not old["ips"] or not result["ips"]:
+            continue
+        rows.append({
+            "workload": result["workload"],
+            "engine": result["engine"],
+            "old_ips": old["ips"],
+            "new_ips": result["ips"],
+            "speedup": round(result["ips"] / old["ips"], 3),
+            "old_peak_bytes": old["peak_bytes"],
+            "new_peak_bytes": result["peak_bytes"],
+        })
+    return rows
+
+def format_results(document):
+    """Format a results document as a text table."""
+    lines = [f"{'workload':<24} {'engine':<9} {'instructions':>12} {'seconds':>9} {'inst/s':>12} {'peak KB':>9}"]
+    for result in document["results"]:
+        lines.append(f"{result['workload']:<24} {result['engine']:<9} {result['instructions']:>12} {result['seconds']:>9.3f} "
+                     f"{result['ips'] or 0:>12,} {result['peak_bytes'] / 1024:>9.1f}")
+    return "\n".join(lines)
+
+def format_comparison(rows):
+    """Format compare_results() rows as a text table."""
+    lines = [f"{'workload':<24} {'engine':<9} {'old inst/s':>12} {'new inst/s':>12} {'speedup':>8} {'peak KB old -> new':>20}"]
+    for row in rows:
+        peak = f"{row['old_peak_bytes'] / 1024:.1f} -> {row['new_peak_bytes'] / 1024:.1f}"
+        lines.append(f"{row['workload']:<24} {row['engine']:<9} {row['old_ips']:>12,} {row['new_ips']:>12,} {row['speedup']:>7.2f}x {peak:>20}")
+    return "\n".join(lines)
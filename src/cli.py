@@ -0,0 +1,220 @@
+from runner import Runner, DEFAULT_MAX_INSTRUCTIONS, ENGINES
+from memory import SparseMemory
+from utils import setup_logging
+from tracefile import TraceWriter, TraceReader, DEFAULT_CHECKPOINT_INTERVAL
+from registers import REGISTER_NAMES, SEGMENT_NAMES, FLAGS_SLOT
+from batch import collect_programs, run_batch
+from profiler import GuestProfiler
+from benchmark import run_benchmarks, compare_results, format_results, format_comparison, workload_names
+from instrumentation import HostTimers, profile_call
+from control_unit import ControlUnit
+from assembler import ObjectCache, default_cache_dir
+from collections import Counter
+import argparse
+import json
+import logging
+import sys
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR")
+
+def build_parser():
+    """Build the argument parser for the headless command-line interface."""
+    parser = argparse.ArgumentParser(prog="python -m src", description="Pentaur headless simulator")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run a program without the GUI and print the final state as JSON")
+    run_parser.add_argument("program", help="Path to an assembly program (.asm or .txt)")
+    run_parser.add_argument("-n", "--max-instructions", type=int, default=DEFAULT_MAX_INSTRUCTIONS, help="Instruction budget (default: %(default)s)")
+    run_parser.add_argument("-e", "--engine", choices=ENGINES, default="control", help="Execution path (default: %(default)s)")
+    run_parser.add_argument("--sparse", action="store_true", help="Use the full 4GB address space, allocating 4KB pages on first write")
+    run_parser.add_argument("--mmap", metavar="FILE", help="Back sparse memory pages with an mmap'd file (implies --sparse)")
+    run_parser.add_argument("--load-image", action="append", default=[], metavar="ADDRESS=FILE", help="Load a raw binary (or .hex) image before running; ADDRESS is SEG:OFFSET, BASE:OFFSET or physical")
+    run_parser.add_argument("--dump", action="append", default=[], metavar="ADDRESS,LENGTH=FILE", help="Dump LENGTH bytes of memory to a raw binary (or .hex) file after running")
+    run_parser.add_argument("--indent", type=int, default=2, help="JSON indentation, 0 for a single line (default: %(default)s)")
+    run_parser.add_argument("--log-file", help="Write the execution log to this file")
+    run_parser.add_argument("--log-level", choices=LOG_LEVELS, default="INFO", help="Log verbosity; DEBUG traces every instruction and stage (default: %(default)s)")
+    run_parser.add_argument("--trace", metavar="FILE", help="Record every executed instruction to a binary trace file")
+    run_parser.add_argument("--profile", action="store_true", help="Add execution counts per instruction, label, opcode and jump to the output")
+    run_parser.add_argument("--profile-top", type=int, default=20, help="Hottest instructions listed by --profile (default: %(default)s)")
+    run_parser.add_argument("--host-timers", action="store_true", help="Add host time spent per simulator subsystem (decode, stages, ALU, flags, memory, logging) to the output")
+    run_parser.add_argument("--cprofile", metavar="FILE", help="Run under cProfile, save the stats to FILE and print the top functions to stderr")
+    add_cache_arguments(run_parser)
+    run_parser.add_argument("--checkpoint-interval", type=int, default=DEFAULT_CHECKPOINT_INTERVAL, help="Steps between full state checkpoints in the trace (default: %(default)s)")
+    run_parser.set_defaults(handler=run_command)
+
+    trace_parser = subparsers.add_parser("trace", help="Inspect a binary trace file written by run --trace")
+    trace_parser.add_argument("file", help="Path to the trace file")
+    trace_parser.add_argument("--start", type=int, default=0, help="First step to print (default: %(default)s)")
+    trace_parser.add_argument("--count", type=int, default=0, help="Print this many step records as JSON lines")
+    trace_parser.add_argument("--state", type=int, metavar="STEP", help="Print the machine state after STEP instructions")
+    trace_parser.set_defaults(handler=trace_command)
+
+    batch_parser = subparsers.add_parser("batch", help="Run many programs in parallel and stream one JSON result per line")
+    batch_parser.add_argument("paths", nargs="+", help="Program files, directories (all .asm/.txt files) or glob patterns")
+    batch_parser.add_argument("-j", "--jobs", type=int, help="Worker processes (default: one per CPU)")
+    batch_parser.add_argument("-n", "--max-instructions", type=int, default=DEFAULT_MAX_INSTRUCTIONS, help="Instruction budget per program (default: %(default)s)")
+    batch_parser.add_argument("-t", "--time-limit", type=float, help="Time budget per program in seconds")
+    batch_parser.add_argument("-e", "--engine", choices=ENGINES, default="control", help="Execution path (default: %(default)s)")
+    batch_parser.add_argument("--state", action="store_true", help="Include each program's final registers, flags, ports and memory")
+    add_cache_arguments(batch_parser)
+    batch_parser.set_defaults(handler=batch_command)
+
+    bench_parser = subparsers.add_parser("bench", help="Measure instructions/second and peak memory per workload and engine")
+    bench_parser.add_argument("-w", "--workload", action="append", choices=workload_names(), help="Workload to run; may be repeated (default: all)")
+    bench_parser.add_argument("-e", "--engine", action="append", choices=ENGINES, help="Engine to measure; may be repeated (default: all)")
+    bench_parser.add_argument("--scale", type=float, default=1.0, help="Multiply workload sizes by this factor (default: %(default)s)")
+    bench_parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement; the fastest is kept (default: %(default)s)")
+    bench_parser.add_argument("-o", "--output", metavar="FILE", help="Save the results as JSON")
+    bench_parser.add_argument("--compare", metavar="FILE", help="Compare against results saved earlier with --output")
+    bench_parser.set_defaults(handler=bench_command)
+    return parser
+
+def add_cache_arguments(parser):
+    """Add the options selecting the assembled object cache."""
+    parser.add_argument("--cache-dir", metavar="DIR", help="Directory of assembled program objects (default: $PENTAUR_CACHE_DIR or ~/.cache/pentaur/objects)")
+    parser.add_argument("--no-cache", action="store_true", help="Decode programs from source without reading or writing assembled objects")
+
+def cache_dir(args):
+    """Return the object cache directory selected by the arguments, or None when caching is off."""
+    if args.no_cache:
+        return None
+    return args.cache_dir or default_cache_dir()
+
+def split_image_spec(spec):
+    """Split an ADDRESS=FILE option value."""
+    address, separator, path = spec.partition("=")
+    if not separator or not address or not path:
+        raise ValueError(f"Expected ADDRESS=FILE, got {spec}")
+    return address, path
+
+def load_images(control_unit, specs):
+    """Load every --load-image into memory."""
+    for spec in specs:
+        address, path = split_image_spec(spec)
+        physical_address = control_unit.resolve_address(address)
+        loaded = control_unit.memory.load_image(path, physical_address)
+        logging.info(f"Loaded {loaded} bytes from {path} at 0x{physical_address:08X}")
+
+def dump_images(control_unit, specs):
+    """Write every --dump range to its file."""
+    for spec in specs:
+        address, path = split_image_spec(spec)
+        address, separator, length = address.rpartition(",")
+        if not separator:
+            raise ValueError(f"Expected ADDRESS,LENGTH=FILE, got {spec}")
+        physical_address = control_unit.resolve_address(address)
+        control_unit.memory.dump_image(path, physical_address, int(length, 0))
+        logging.info(f"Dumped {length} bytes at 0x{physical_address:08X} to {path}")
+
+def run_command(args):
+    """Execute the `run` command and return the process exit code."""
+    with open(args.program, "r") as f:
+        source = f.read()
+    memory = SparseMemory(args.mmap) if args.sparse or args.mmap else None
+    trace = None
+    timers = None
+    try:
+        if args.trace:
+            trace = TraceWriter(args.trace, args.checkpoint_interval)
+        directory = cache_dir(args)
+        control_unit = ControlUnit(memory, ObjectCache(directory) if directory is not None else None)
+        if args.host_timers:
+            # Installed before the program is decoded so decoding and the ALU micro-ops are timed too
+            timers = HostTimers()
+            timers.instrument(control_unit)
+        runner = Runner(source, engine=args.engine, max_instructions=args.max_instructions, trace=trace, control_unit=control_unit)
+        if args.host_timers:
+            timers.wrap_stages(runner.pipeline)
+        if args.profile:
+            runner.profiler = GuestProfiler(runner.program)
+        load_images(runner.control_unit, args.load_image)
+        if args.cprofile:
+            _, stats = profile_call(runner.run, args.cprofile)
+            sys.stderr.write(stats)
+        else:
+            runner.run()
+        dump_images(runner.control_unit, args.dump)
+        state = runner.machine_state()
+        if args.profile:
+            state["profile"] = runner.profiler.report(args.profile_top)
+        if timers is not None:
+            state["host_timers"] = timers.report()
+    finally:
+        # Wrappers come off in the reverse order they went on: the trace wrapped memory.write after the timers
+        if trace is not None:
+            trace.close()
+        if timers is not None:
+            timers.unwrap_all()
+        if memory is not None:
+            memory.close()
+    json.dump(state, sys.stdout, indent=args.indent or None)
+    sys.stdout.write("\n")
+    return 0 if runner.status == "completed" else 1
+
+def trace_command(args):
+    """Execute the `trace` command: print a summary, step records or the state at a step."""
+    with TraceReader(args.file) as reader:
+        if args.state is not None:
+            state, memory = reader.state_at(args.state)
+            result = {
+                "step": args.state,
+                "registers": {name: state[slot] for slot, name in enumerate(REGISTER_NAMES)},
+                "segments": {name: state[slot] for slot, name in enumerate(SEGMENT_NAMES, len(REGISTER_NAMES))},
+                "flags": {flag: (state[FLAGS_SLOT] >> bit) & 1 for bit, flag in enumerate(['ZF', 'SF', 'CF', 'OF'])},
+                "memory": {f"0x{addr:08X}": val for addr, val in sorted(memory.items())},
+            }
+            json.dump(result, sys.stdout)
+            sys.stdout.write("\n")
+        elif args.count:
+            for record in reader.steps_between(args.start, args.start + args.count):
+                json.dump(record, sys.stdout)
+                sys.stdout.write("\n")
+        else:
+            json.dump({"steps": len(reader), "checkpoints": len(reader.checkpoint_steps), "checkpoint_interval": reader.checkpoint_interval}, sys.stdout)
+            sys.stdout.write("\n")
+    return 0
+
+def batch_command(args):
+    """Execute the `batch` command; the exit code is 0 only when every program completed."""
+    programs = collect_programs(args.paths)
+    if not programs:
+        raise ValueError(f"No .asm or .txt programs found in {', '.join(args.paths)}")
+    statuses = Counter()
+    for result in run_batch(programs, args.engine, args.max_instructions, args.time_limit, args.jobs, args.state, cache_dir(args)):
+        statuses[result["status"]] += 1
+        json.dump(result, sys.stdout)
+        sys.stdout.write("\n")
+        sys.stdout.flush()
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+    print(f"{len(programs)} programs: {summary}", file=sys.stderr)
+    return 0 if statuses["completed"] == len(programs) else 1
+
+def bench_command(args):
+    """Execute the `bench` command: print a results table, optionally saving and comparing JSON results."""
+    progress = lambda result: print(f"{result['workload']} [{result['engine']}]: {result['ips'] or 0:,} inst/s", file=sys.stderr)
+    document = run_benchmarks(args.workload, args.engine or ENGINES, args.scale, args.repeat, progress)
+    print(format_results(document))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        print()
+        print(format_comparison(compare_results(baseline, document)))
+    return 0
+
+def main(argv=None):
+    """Entry point for `python -m src`."""
+    args = build_parser().parse_args(argv)
+    if getattr(args, "log_file", None):
+        setup_logging(args.log_file, getattr(logging, args.log_level))
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+from operation import Operation
+from flags import CARRY_OVERFLOW_RULES
+from registers import REGISTER_SLOTS, SEGMENT_SLOTS
+from collections import OrderedDict
+import hashlib
+import logging
+
+MASK = 0xFFFFFFFF
+JUMPS = (Operation.JMP, Operation.JE, Operation.JNE, Operation.JG, Operation.JL)
+# Instructions whose generated code can raise ValueError (memory bounds, negative shift counts)
+FAULTING = (Operation.LOAD, Operation.STORE, Operation.PUSH, Operation.POP, Operation.SHL, Operation.SHR, Operation.ROL, Operation.ROR)
+CACHE_SIZE = 32
+
+# Result expressions for ALU operations, formatted with the operand locals a and b
+EXPRESSIONS = {
+    Operation.ADD: "({a} + {b}) & 0xFFFFFFFF",
+    Operation.SUB: "({a} - {b}) & 0xFFFFFFFF",
+    Operation.AND: "({a} & {b}) & 0xFFFFFFFF",
+    Operation.OR: "({a} | {b}) & 0xFFFFFFFF",
+    Operation.XOR: "({a} ^ {b}) & 0xFFFFFFFF",
+    Operation.SHL: "({a} << {b}) & 0xFFFFFFFF",
+    Operation.SHR: "({a} >> {b}) & 0xFFFFFFFF",
+    Operation.ROL: "(({a} << {b}) | ({a} >> (32 - {b}))) & 0xFFFFFFFF",
+    Operation.ROR: "(({a} >> {b}) | ({a} << (32 - {b}))) & 0xFFFFFFFF",
+    Operation.NOT: "(~{a}) & 0xFFFFFFFF",
+    Operation.INC: "({a} + 1) & 0xFFFFFFFF",
+    Operation.DEC: "({a} - 1) & 0xFFFFFFFF",
+    Operation.CMP: "({a} - {b}) & 0xFFFFFFFF",
+}
+
+# Raised by a compiled block when an instruction faults; state is committed up to that instruction
+class BlockFault(Exception):
+    def __init__(self, index, executed, error):
+        super().__init__(str(error))
+        self.index = index  # Instruction index that faulted
+        self.executed = executed  # Instructions of the block completed before the fault
+        self.error = error
+
+# A straight-line run of instructions compiled into one Python function
+class Block:
+    __slots__ = ("start", "length", "function", "source")
+
+    def __init__(self, start, length, function, source):
+        self.start = start
+        self.length = length
+        self.function = function  # (state, flags, ports, read, write) -> next index
+        self.source = source
+
+# Compiled form of a Program: basic blocks keyed by their first instruction index
+class CompiledProgram:
+    def __init__(self, blocks):
+        self.blocks = blocks  # Instruction index -> Block, for block leaders only
+
+def find_leaders(program):
+    """Return the sorted instruction indices that start a basic block."""
+    count = len(program)
+    leaders = {0}
+    leaders.update(target for target in program.labels.values() if target < count)
+    for index, decoded in enumerate(program.decoded):
+        if decoded is None or decoded.fault is not None:
+            # Instructions that fail to decode or resolve run alone through the interpreter
+            leaders.add(index)
+            leaders.add(index + 1)
+        elif decoded.op in JUMPS:
+            leaders.add(index + 1)
+    return sorted(leader for leader in leaders if leader < count)
+
+def _operand(reg, imm):
+    """Return the Python expression for a register or immediate operand."""
+    return reg if reg is not None else repr(imm)
+
+def _flag_condition(op, flag_setter):
+    """Return a Python expression for a jump condition, inlined when the block set the flags."""
+    if op == Operation.JMP:
+        return "True"
+    if flag_setter is None:
+        zf, cf = "flags.ZF", "flags.CF"
+    else:
+        k, setter_op = flag_setter
+        zf = f"r{k} == 0"
+        if setter_op in (Operation.SUB, Operation.CMP):
+            cf = f"a{k} < b{k}"
+        elif setter_op == Operation.DEC:
+            cf = f"a{k} < 1"
+        elif setter_op == Operation.ADD:
+            cf = f"a{k} + b{k} > 0xFFFFFFFF"
+        elif setter_op == Operation.INC:
+            cf = f"a{k} + 1 > 0xFFFFFFFF"
+        elif setter_op in CARRY_OVERFLOW_RULES:
+            cf = f"RULES[OP_{setter_op.value}](a{k}, b{k}, r{k})[0]"
+        else:
+            cf = "False"
+    if op == Operation.JE:
+        return zf
+    if op == Operation.JNE:
+        return f"not ({zf})"
+    if op == Operation.JG:
+        return f"not ({cf}) and not ({zf})"
+    return cf
+
+def generate_block(program, start, end):
+    """Generate Python source for the instructions in [start, end)."""
+    body = []
+    used = set()
+    written = set()
+    flag_setter = None  # (instruction index, op) of the last flag-setting instruction
+    fault_flags = {}  # Faulting instruction index -> flag setter in effect before it
+    exit_line = f"return {end}"
+    for k in range(start, end):
+        d = program.decoded[k]
+        op = d.op
+        for reg in (d.src1_reg, d.src2_reg):
+            if reg is not None:
+                used.add(reg)
+        if op in FAULTING:
+            body.append(f"i = {k}")
+            fault_flags[k] = flag_setter
+        if op == Operation.MOV:
+            body.append(f"{d.dest} = {d.src1_reg if d.src1_reg is not None else d.src1_imm & MASK}")
+            written.add(d.dest)
+        elif op in EXPRESSIONS:
+            body.append(f"a{k} = {_operand(d.src1_reg, d.src1_imm)}")
+            if op in (Operation.NOT, Operation.INC, Operation.DEC):
+                flag_operand = 0 if op == Operation.NOT else 1
+                body.append(f"b{k} = {flag_operand}")
+            else:
+                body.append(f"b{k} = {_operand(d.src2_reg, d.src2_imm)}")
+            body.append(f"r{k} = " + EXPRESSIONS[op].format(a=f"a{k}", b=f"b{k}"))
+            if op != Operation.CMP:
+                body.append(f"{d.dest} = r{k}")
+                written.add(d.dest)
+            flag_setter = (k, op)
+        elif op == Operation.LOAD:
+            body.append(f"{d.dest} = read((state[{SEGMENT_SLOTS['DS']}] + {d.src1_imm}) & 0xFFFFFFFF)")
+            written.add(d.dest)
+        elif op == Operation.STORE:
+            used.add(d.src1)
+            body.append(f"write((state[{SEGMENT_SLOTS['DS']}] + {d.dest_imm}) & 0xFFFFFFFF, {d.src1})")
+        elif op == Operation.MOVSEG:
+            body.append(f"state[{d.dest_slot}] = {d.src1_imm & MASK}")
+        elif op == Operation.PUSH:
+            used.add('SP')
+            body.append(f"write((state[{SEGMENT_SLOTS['SS']}] + SP - 4) & 0xFFFFFFFF, {_operand(d.src1_reg, d.src1_imm)})")
+            body.append("SP = (SP - 4) & 0xFFFFFFFF")
+            written.add('SP')
+        elif op == Operation.POP:
+            used.add('SP')
+            body.append(f"v{k} = read((state[{SEGMENT_SLOTS['SS']}] + SP) & 0xFFFFFFFF)")
+            body.append(f"sp{k} = SP")
+            body.append(f"{d.dest} = v{k}")
+            body.append(f"SP = (sp{k} + 4) & 0xFFFFFFFF")
+            written.update((d.dest, 'SP'))
+        elif op == Operation.IN:
+            body.append(f"{d.dest} = ports.get({d.src1_imm}, 0) & 0xFFFFFFFF")
+            written.add(d.dest)
+        elif op == Operation.OUT:
+            used.add(d.src1)
+            body.append(f"ports[{d.dest_imm}] = {d.src1}")
+        elif op in JUMPS:
+            condition = _flag_condition(op, flag_setter)
+            if condition == "True":
+                exit_line = f"return {d.target}"
+            else:
+                exit_line = f"return {d.target} if {condition} else {end}"
+    used |= written
+    writeback = [f"state[{REGISTER_SLOTS[reg]}] = {reg}" for reg in sorted(written)]
+    if flag_setter is not None:
+        k, op = flag_setter
+        final_flags = [f"flags.set_flags(r{k}, OP_{op.value}, a{k}, b{k})"]
+    else:
+        final_flags = []
+    lines = [f"def block_{start}(state, flags, ports, read, write):"]
+    lines += [f"    {reg} = state[{REGISTER_SLOTS[reg]}]" for reg in sorted(used)]
+    if fault_flags:
+        lines.append("    i = None")
+        lines.append("    try:")
+        lines += [f"        {line}" for line in body]
+        lines.append("    except ValueError as e:")
+        lines += [f"        {line}" for line in writeback]
+        for k, setter in fault_flags.items():
+            if setter is not None:
+                lines.append(f"        if i == {k}:")
+                lines.append(f"            flags.set_flags(r{setter[0]}, OP_{setter[1].value}, a{setter[0]}, b{setter[0]})")
+        lines.append(f"        raise BlockFault(i, i - {start}, e)")
+    else:
+        lines += [f"    {line}" for line in body]
+    lines += [f"    {line}" for line in writeback + final_flags]
+    lines.append(f"    {exit_line}")
+    return "\n".join(lines) + "\n"
+
+_NAMESPACE = {f"OP_{op.value}": op for op in Operation}
+_NAMESPACE.update(RULES=CARRY_OVERFLOW_RULES, BlockFault=BlockFault)
+_cache = OrderedDict()  # Source hash -> CompiledProgram, least recently used first
+
+def compile_program(program):
+    """Compile a decoded Program into basic blocks, reusing a cached result for the same source."""
+    key = hashlib.sha256(program.source.encode()).hexdigest()
+    compiled = _cache.get(key)
+    if compiled is not None:
+        _cache.move_to_end(key)
+        return compiled
+    leaders = find_leaders(program)
+    blocks = {}
+    for position, start in enumerate(leaders):
+        end = leaders[position + 1] if position + 1 < len(leaders) else len(program)
+        decoded = program.decoded[start]
+        if decoded is None or decoded.fault is not None:
+            continue
+        source = generate_block(program, start, end)
+        namespace = dict(_NAMESPACE)
+        exec(compile(source, f"<block {start}>", "exec"), namespace)
+        blocks[start] = Block(start, end - start, namespace[f"block_{start}"], source)
+    compiled = CompiledProgram(blocks)
+    _cache[key] = compiled
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    logging.info("Compiled %d basic blocks from %d instructions", len(blocks), len(program))
+    return compiled
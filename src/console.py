@@ -0,0 +1,72 @@
+import tkinter as tk
+
+MAX_CONSOLE_LINES = 2000  # Lines kept in the output widget; older lines remain in processor.log
+FLUSH_DELAY_MS = 16  # Pending lines are inserted at most once per display frame
+
+# Verbosity levels: a line is shown when its level is at most the console's verbosity
+ERRORS = 0  # Errors and run summaries
+INSTRUCTIONS = 1  # One line per instruction started or completed
+STAGES = 2  # Per-stage progress and results
+VERBOSITY_LEVELS = {"Errors": ERRORS, "Instructions": INSTRUCTIONS, "Stages": STAGES}
+
+# Read-only output console that batches writes into one insert per frame and keeps a bounded scrollback
+class OutputConsole:
+    def __init__(self, root, text, max_lines=MAX_CONSOLE_LINES):
+        self.root = root
+        self.text = text  # tk.Text kept disabled except while flushing
+        self.max_lines = max_lines
+        self.verbosity = STAGES
+        self.pending = []  # Text written since the last flush
+        self.lines = 0  # Lines currently in the widget
+        self.trimmed = 0  # Lines dropped from the top since the last clear
+        self._flush_id = None
+
+    def write(self, text, level=ERRORS):
+        """Queue text for the next flush if level is within the current verbosity."""
+        if level > self.verbosity:
+            return
+        self.pending.append(text)
+        if self._flush_id is None:
+            self._flush_id = self.root.after(FLUSH_DELAY_MS, self.flush)
+
+    def flush(self):
+        """Insert all pending text at once, drop the oldest lines beyond max_lines and scroll to the end."""
+        if self._flush_id is not None:
+            self.root.after_cancel(self._flush_id)
+            self._flush_id = None
+        if not self.pending:
+            return
+        chunk = "".join(self.pending)
+        self.pending = []
+        added = chunk.count("\n")
+        text = self.text
+        text.config(state="normal")
+        if added >= self.max_lines:
+            # Only the tail of a large burst can be shown anyway
+            chunk = "\n".join(chunk.split("\n")[-self.max_lines - 1:])
+            self.trimmed += self.lines + added - self.max_lines
+            text.delete("1.0", tk.END)
+            self.lines = 0
+            added = self.max_lines
+        text.insert(tk.END, chunk)
+        self.lines += added
+        excess = self.lines - self.max_lines
+        if excess > 0:
+            text.delete("1.0", f"{excess + 1}.0")
+            self.lines -= excess
+            self.trimmed += excess
+        text.see(tk.END)
+        text.config(state="disabled")
+
+    def clear(self):
+        """Discard pending and shown output."""
+        self.pending = []
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.config(state="disabled")
+        self.lines = 0
+        self.trimmed = 0
+
+    def is_empty(self):
+        """Return True if nothing has been written since the last clear."""
+        return not self.pending and self.lines == 0 and not self.text.get("1.0", "end-1c").strip()
@@ -1,20 +1,162 @@
 from alu import ALU, Operation
-from registers import RegisterFile, SegmentRegisters, Flags
+from registers import RegisterFile, SegmentRegisters, Flags, new_state, REGISTER_SLOTS, SEGMENT_SLOTS, FLAGS_SLOT
 from memory import Memory
+from program import DecodedInstruction, Program
+from microcode import Latch, compile_plan
+from contextlib import contextmanager
+import gc
 import logging
 import re
 
+@contextmanager
+def collection_paused():
+    """Pause cyclic garbage collection; plans build several closures per instruction, and collecting while they are created costs more than building them."""
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if collecting:
+            gc.enable()
+
+# Saved machine state: packed registers, segments and flags, ports and a copy-on-write memory fork
+class MachineSnapshot:
+    __slots__ = ("state", "ports", "memory", "jump_to")
+
+    def __init__(self, state, ports, memory, jump_to):
+        self.state = state
+        self.ports = ports
+        self.memory = memory
+        self.jump_to = jump_to
+
 # Control unit class to manage instruction execution
 class ControlUnit:
-    def __init__(self):
+    def __init__(self, memory=None, object_cache=None):
         self.alu = ALU()
-        self.register_file = RegisterFile()
-        self.memory = Memory()
-        self.segment_regs = SegmentRegisters()
+        self.state = new_state()  # Registers, segments and flags packed into 32-bit slots
+        self.register_file = RegisterFile(self.state)
+        self.memory = memory if memory is not None else Memory()
+        self.segment_regs = SegmentRegisters(self.state)
         self.flags = Flags()
         self.ports = {}  # Simulated I/O ports
         self.labels = {}  # Jump labels
         self.jump_to = None  # Jump target index
+        self.program = None  # Decoded program cache
+        self.object_cache = object_cache  # assembler.ObjectCache of assembled programs on disk, or None
+        self.latch = Latch()  # Values passed between micro-op stages
+
+    def load_program(self, source):
+        """Decode a program once; the cached Program is reused until the source changes, and an object cache skips decoding entirely."""
+        if self.program is None or self.program.source != source:
+            with collection_paused():
+                program = self.object_cache.load(source, self) if self.object_cache is not None else None
+                if program is not None:
+                    logging.info("Program loaded from object: %d instructions, %d labels", len(program), len(program.labels))
+                else:
+                    program = Program(source)
+                    self.labels = program.labels
+                    program.decode(self)
+                    logging.info("Program decoded: %d instructions, %d labels", len(program), len(program.labels))
+                    if self.object_cache is not None:
+                        self.object_cache.store(program)
+            self.program = program
+        self.labels = self.program.labels
+        return self.program
+
+    def adopt_program(self, program):
+        """Run a Program decoded by another control unit; only the micro-op plans bound to this one's state are rebuilt, as instructions are first fetched."""
+        self.program = program.bind(self)
+        self.labels = self.program.labels
+        return self.program
+
+    def state_view(self):
+        """Return a zero-copy memoryview of the packed registers, segments and flags."""
+        self.state[FLAGS_SLOT] = self.flags.pack()
+        return memoryview(self.state)
+
+    def snapshot(self):
+        """Capture the machine state; memory pages are shared until either side writes them."""
+        self.state[FLAGS_SLOT] = self.flags.pack()
+        return MachineSnapshot(self.state[:], dict(self.ports), self.memory.fork(), self.jump_to)
+
+    def restore(self, snapshot):
+        """Return the machine to a snapshot, updating state in place so decoded plans stay bound."""
+        self.state[:] = snapshot.state
+        self.flags.unpack(snapshot.state[FLAGS_SLOT])
+        self.ports.clear()
+        self.ports.update(snapshot.ports)
+        self.memory.restore(snapshot.memory)
+        self.jump_to = snapshot.jump_to
+        self.latch.clear()
+
+    def fork(self):
+        """Return an independent ControlUnit with this one's state and program; memory is copy-on-write."""
+        clone = ControlUnit(self.memory.fork(), self.object_cache)
+        self.state[FLAGS_SLOT] = self.flags.pack()
+        clone.state[:] = self.state
+        clone.flags.unpack(self.state[FLAGS_SLOT])
+        clone.ports.update(self.ports)
+        clone.jump_to = self.jump_to
+        if self.program is not None:
+            clone.adopt_program(self.program)
+        return clone
+
+    def resolve_address(self, spec):
+        """Resolve "SEG:offset", "base:offset" or a plain physical address string to a physical address."""
+        try:
+            if ':' in spec:
+                segment, offset = spec.split(':', 1)
+                segment = segment.strip().upper()
+                base = self.segment_regs.get_base(segment) if segment in self.segment_regs.segments else int(segment, 0)
+                return self.memory.compute_physical_address(base, int(offset.strip(), 0))
+            return int(spec.strip(), 0) & 0xFFFFFFFF
+        except ValueError as e:
+            raise ValueError(f"Invalid address {spec}: {str(e)}")
+
+    def decode(self, instruction):
+        """Decode an instruction and resolve its operands, returning a DecodedInstruction or None."""
+        op, dest, src1, src2 = self.decode_instruction(instruction)
+        if op is None:
+            return None
+        decoded = DecodedInstruction(instruction, op, dest, src1, src2)
+        try:
+            if op in [Operation.JMP, Operation.JE, Operation.JNE, Operation.JG, Operation.JL]:
+                decoded.target = self.labels[dest]
+            elif op in [Operation.LOAD, Operation.IN, Operation.MOVSEG]:
+                decoded.src1_imm = int(src1, 0)
+            elif op in [Operation.STORE, Operation.OUT]:
+                decoded.dest_imm = int(dest, 0)
+            else:
+                if src1 is not None:
+                    decoded.src1_reg, decoded.src1_imm = self._resolve_operand(src1)
+                if src2 is not None:
+                    decoded.src2_reg, decoded.src2_imm = self._resolve_operand(src2)
+            if op in [Operation.STORE, Operation.OUT]:
+                register = src1
+                decoded.src1_slot = REGISTER_SLOTS.get(src1)
+            elif op in [Operation.MOVSEG, Operation.CMP, Operation.PUSH, Operation.JMP, Operation.JE, Operation.JNE, Operation.JG, Operation.JL]:
+                register = None
+            else:
+                register = dest
+                decoded.dest_slot = REGISTER_SLOTS.get(dest)
+            if register is not None and register not in self.register_file.registers:
+                raise ValueError(f"Register {register} does not exist")
+            if op == Operation.MOVSEG:
+                decoded.dest_slot = SEGMENT_SLOTS[dest]
+            if decoded.src1_reg is not None:
+                decoded.src1_slot = REGISTER_SLOTS[decoded.src1_reg]
+            if decoded.src2_reg is not None:
+                decoded.src2_slot = REGISTER_SLOTS[decoded.src2_reg]
+        except ValueError as e:
+            decoded.fault = str(e)
+        decoded.plan = compile_plan(self, decoded)
+        return decoded
+
+    def _resolve_operand(self, operand):
+        """Resolve an operand to (register, None) or (None, immediate)."""
+        if operand in self.register_file.registers:
+            return operand, None
+        return None, int(operand, 0)
 
     def decode_instruction(self, instruction):
         """Parse and validate an instruction."""
@@ -23,7 +165,7 @@ class ControlUnit:
             if not parts:
                 return None, None, None, None
             op = parts[0].upper()
-            if op not in [e.value for e in Operation]:
+            if op not in Operation.__members__:
                 raise ValueError(f"Instruction {op} is not valid")
             op = Operation(op)
             if op in [Operation.MOV, Operation.MOVSEG, Operation.NOT, Operation.INC, Operation.DEC, Operation.LOAD, Operation.STORE, Operation.IN, Operation.OUT, Operation.CMP]:
@@ -85,89 +227,18 @@ class ControlUnit:
         except Exception as e:
             raise ValueError(f"Error parsing instruction: {str(e)}")
 
-    def execute_instruction(self, op, dest, src1, src2):
-        """Execute a decoded instruction and return result string."""
-        logging.info(f"Executing instruction: {op} {dest} {src1} {src2}")
+    def step(self, decoded):
+        """Run every micro-op of a decoded instruction without formatting a result."""
+        latch = self.latch
         try:
-            if op == Operation.MOV:
-                value = self.register_file.read(src1) if src1 in self.register_file.registers else int(src1, 0)
-                self.register_file.write(dest, value)
-                return f"{op.value} {dest}, {src1}"
-            elif op in [Operation.ADD, Operation.SUB, Operation.AND, Operation.OR, Operation.XOR, Operation.SHL, Operation.SHR, Operation.ROL, Operation.ROR]:
-                val1 = self.register_file.read(src1) if src1 in self.register_file.registers else int(src1, 0)
-                val2 = self.register_file.read(src2) if src2 in self.register_file.registers else int(src2, 0)
-                result = self.alu.execute(op, val1, val2)
-                self.flags.set_flags(result, op, val1, val2)
-                self.register_file.write(dest, result)
-                return f"{op.value} {dest}, {src1}, {src2} -> {result}"
-            elif op in [Operation.NOT, Operation.INC, Operation.DEC]:
-                val1 = self.register_file.read(src1) if src1 in self.register_file.registers else int(src1, 0)
-                result = self.alu.execute(op, val1, 0)
-                self.flags.set_flags(result, op, val1, 1 if op in [Operation.INC, Operation.DEC] else 0)
-                self.register_file.write(dest, result)
-                return f"{op.value} {dest}, {src1} -> {result}"
-            elif op == Operation.LOAD:
-                offset = int(src1, 0)
-                segment_base = self.segment_regs.get_base('DS')
-                physical_address = self.memory.compute_physical_address(segment_base, offset)
-                value = self.memory.read(physical_address)
-                self.register_file.write(dest, value)
-                return f"{op.value} {dest}, [DS:{offset}] -> {value} (phys: 0x{physical_address:08X})"
-            elif op == Operation.STORE:
-                offset = int(dest, 0)
-                segment_base = self.segment_regs.get_base('DS')
-                physical_address = self.memory.compute_physical_address(segment_base, offset)
-                value = self.register_file.read(src1)
-                self.memory.write(physical_address, value)
-                return f"{op.value} [DS:{offset}], {src1} (phys: 0x{physical_address:08X})"
-            elif op == Operation.MOVSEG:
-                value = int(src1, 0)
-                self.segment_regs.set_base(dest, value)
-                return f"{op.value} {dest}, {src1}"
-            elif op == Operation.PUSH:
-                sp = self.register_file.read('SP')
-                physical_address = self.memory.compute_physical_address(self.segment_regs.get_base('SS'), sp - 4)
-                value = self.register_file.read(src1) if src1 in self.register_file.registers else int(src1, 0)
-                self.memory.write(physical_address, value)
-                self.register_file.write('SP', sp - 4)
-                return f"{op.value} {src1} (addr: 0x{physical_address:08X})"
-            elif op == Operation.POP:
-                sp = self.register_file.read('SP')
-                physical_address = self.memory.compute_physical_address(self.segment_regs.get_base('SS'), sp)
-                value = self.memory.read(physical_address)
-                self.register_file.write(dest, value)
-                self.register_file.write('SP', sp + 4)
-                return f"{op.value} {dest} <- [{physical_address}] {value}"
-            elif op == Operation.IN:
-                port = int(src1, 0)
-                value = self.ports.get(port, 0)
-                self.register_file.write(dest, value)
-                return f"{op.value} {dest}, port {src1} -> {value}"
-            elif op == Operation.OUT:
-                port = int(dest, 0)
-                value = self.register_file.read(src1)
-                self.ports[port] = value
-                return f"{op.value} {src1}, port {dest}"
-            elif op == Operation.CMP:
-                val1 = self.register_file.read(src1) if src1 in self.register_file.registers else int(src1, 0)
-                val2 = self.register_file.read(src2) if src2 in self.register_file.registers else int(src2, 0)
-                result = self.alu.execute(op, val1, val2)
-                self.flags.set_flags(result, op, val1, val2)
-                return f"{op.value} {src1}, {src2}"
-            elif op in [Operation.JMP, Operation.JE, Operation.JNE, Operation.JG, Operation.JL]:
-                condition = False
-                if op == Operation.JMP:
-                    condition = True
-                elif op == Operation.JE:
-                    condition = self.flags.ZF
-                elif op == Operation.JNE:
-                    condition = not self.flags.ZF
-                elif op == Operation.JG:
-                    condition = not self.flags.CF and not self.flags.ZF
-                elif op == Operation.JL:
-                    condition = self.flags.CF
-                if condition:
-                    self.jump_to = self.labels[dest]
-                return f"{op.value} {dest} {'taken' if condition else 'not taken'}"
+            for micro_op in decoded.plan.sequence:
+                micro_op(latch)
         except ValueError as e:
-            raise ValueError(f"Execution error: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Execution error: {str(e)}")
+
+    def execute_instruction(self, decoded):
+        """Execute a decoded instruction and return result string."""
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug("Executing instruction: %s %s %s %s", decoded.op, decoded.dest, decoded.src1, decoded.src2)
+        self.step(decoded)
+        return decoded.plan.describe(self.latch)
@@ -1,31 +1,134 @@
 from operation import Operation
 
+# Carry/overflow rules per operation; each returns (CF, OF) for a 32-bit result
+def _add_flags(operand1, operand2, result):
+    return (operand1 + operand2) > 0xFFFFFFFF, (((operand1 ^ operand2) & 0x80000000) == 0) and ((operand1 ^ result) & 0x80000000 != 0)
+
+def _sub_flags(operand1, operand2, result):
+    return operand1 < operand2, (((operand1 ^ operand2) & 0x80000000) != 0) and ((operand1 ^ result) & 0x80000000 != 0)
+
+def _inc_flags(operand1, operand2, result):
+    return _add_flags(operand1, 1, result)
+
+def _dec_flags(operand1, operand2, result):
+    return _sub_flags(operand1, 1, result)
+
+def _shl_flags(operand1, operand2, result):
+    return (operand1 & 0x80000000) != 0, False
+
+def _shr_flags(operand1, operand2, result):
+    return (operand1 & 1) != 0, False
+
+def _rotate_flags(operand1, operand2, result):
+    return (result & 1) != 0, False
+
+CARRY_OVERFLOW_RULES = {
+    Operation.ADD: _add_flags,
+    Operation.INC: _inc_flags,
+    Operation.SUB: _sub_flags,
+    Operation.CMP: _sub_flags,
+    Operation.DEC: _dec_flags,
+    Operation.SHL: _shl_flags,
+    Operation.SHR: _shr_flags,
+    Operation.ROL: _rotate_flags,
+    Operation.ROR: _rotate_flags,
+}
+
 # Define Flags class to manage processor flags (ZF, SF, CF, OF)
 class Flags:
-    def __init__(self):
-        self.ZF = False  # Zero Flag
-        self.SF = False  # Sign Flag
-        self.CF = False  # Carry Flag
-        self.OF = False  # Overflow Flag
+    def __init__(self, lazy=True):
+        self.lazy = lazy  # Record the last flag-setting operation and evaluate flags on read
+        self._pending = None  # (result, op, operand1, operand2) not yet materialized
+        self._ZF = False  # Zero Flag
+        self._SF = False  # Sign Flag
+        self._CF = False  # Carry Flag
+        self._OF = False  # Overflow Flag
 
     def set_flags(self, result, op, operand1, operand2):
         """Set flags based on ALU operation result."""
+        if self.lazy:
+            self._pending = (result, op, operand1, operand2)
+        else:
+            self._compute(result, op, operand1, operand2)
+
+    def _compute(self, result, op, operand1, operand2):
+        """Compute and store all four flags for an operation."""
         result = result & 0xFFFFFFFF
-        self.ZF = result == 0
-        self.SF = (result & 0x80000000) != 0
-        self.CF = False
-        self.OF = False
-        if op in [Operation.ADD, Operation.SUB, Operation.CMP, Operation.INC, Operation.DEC]:
-            if op == Operation.ADD or op == Operation.INC:
-                self.CF = (operand1 + (operand2 if op != Operation.INC else 1)) > 0xFFFFFFFF
-                self.OF = (((operand1 ^ (operand2 if op != Operation.INC else 1)) & 0x80000000) == 0) and ((operand1 ^ result) & 0x80000000 != 0)
-            elif op == Operation.SUB or op == Operation.DEC or op == Operation.CMP:
-                self.CF = operand1 < (operand2 if op != Operation.DEC else 1)
-                self.OF = (((operand1 ^ (operand2 if op != Operation.DEC else 1)) & 0x80000000) != 0) and ((operand1 ^ result) & 0x80000000 != 0)
-        elif op in [Operation.AND, Operation.OR, Operation.XOR, Operation.NOT]:
-            self.CF = False
-            self.OF = False
-        elif op in [Operation.SHL, Operation.SHR]:
-            self.CF = (operand1 & (1 << (31 if op == Operation.SHL else 0))) != 0
-        elif op in [Operation.ROL, Operation.ROR]:
-            self.CF = (result & 1) != 0
+        self._ZF = result == 0
+        self._SF = (result & 0x80000000) != 0
+        rule = CARRY_OVERFLOW_RULES.get(op)
+        if rule is None:
+            # Logical operations (and anything else) clear CF and OF
+            self._CF = False
+            self._OF = False
+        else:
+            self._CF, self._OF = rule(operand1, operand2, result)
+
+    def materialize(self):
+        """Evaluate a pending lazy operation into stored flag values."""
+        if self._pending is not None:
+            pending = self._pending
+            self._pending = None
+            self._compute(*pending)
+
+    def pack(self):
+        """Return the flags packed as bits: ZF=1, SF=2, CF=4, OF=8."""
+        return int(self.ZF) | (int(self.SF) << 1) | (int(self.CF) << 2) | (int(self.OF) << 3)
+
+    def unpack(self, bits):
+        """Set all flags from packed bits, dropping any pending lazy operation."""
+        self._pending = None
+        self._ZF = bool(bits & 1)
+        self._SF = bool(bits & 2)
+        self._CF = bool(bits & 4)
+        self._OF = bool(bits & 8)
+
+    def _carry_overflow(self):
+        """Return (CF, OF) for the pending operation."""
+        result, op, operand1, operand2 = self._pending
+        rule = CARRY_OVERFLOW_RULES.get(op)
+        return rule(operand1, operand2, result & 0xFFFFFFFF) if rule is not None else (False, False)
+
+    @property
+    def ZF(self):
+        if self._pending is not None:
+            return self._pending[0] & 0xFFFFFFFF == 0
+        return self._ZF
+
+    @ZF.setter
+    def ZF(self, value):
+        self.materialize()
+        self._ZF = value
+
+    @property
+    def SF(self):
+        if self._pending is not None:
+            return (self._pending[0] & 0x80000000) != 0
+        return self._SF
+
+    @SF.setter
+    def SF(self, value):
+        self.materialize()
+        self._SF = value
+
+    @property
+    def CF(self):
+        if self._pending is not None:
+            return self._carry_overflow()[0]
+        return self._CF
+
+    @CF.setter
+    def CF(self, value):
+        self.materialize()
+        self._CF = value
+
+    @property
+    def OF(self):
+        if self._pending is not None:
+            return self._carry_overflow()[1]
+        return self._OF
+
+    @OF.setter
+    def OF(self, value):
+        self.materialize()
+        self._OF = value
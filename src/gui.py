@@ -1,23 +1,78 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 from control_unit import ControlUnit
 from pipeline import Pipeline
+from journal import UndoJournal
+from profiler import GuestProfiler
+from registers import REGISTER_NAMES, REGISTER_SLOTS, SEGMENT_NAMES, SEGMENT_SLOTS, FLAGS_SLOT
+from instrumentation import HostTimers, format_timers, format_stats
+from console import OutputConsole, VERBOSITY_LEVELS, INSTRUCTIONS, STAGES
+from memory_view import MemoryViewer, VIEW_MODES
+from render import RenderScheduler
+from runner import Runner
+from assembler import ObjectCache
+from worker import ExecutionWorker
+from utils import get_log_file_path, setup_logging, stop_logging, LazyMessage
+import cProfile
 import logging
-import re
 import os
+import sys
+import time
+
+METER_INTERVAL_MS = 1000  # Refresh period of the instructions-per-second meter
+RUN_SPEEDS = {"Animated": 1.0, "Fast": 0.1, "Turbo": 0.0, "Background": 0.0}  # Run speed -> scale of the animation delays
+TURBO_SLICE_SECONDS = 0.015  # Execution time per after() callback in turbo mode, leaving the rest of a frame to Tk
+POLL_INTERVAL_MS = 33  # How often the GUI renders the latest snapshot of a background run
+AUTO_VERBOSITY = {"Animated": "Stages", "Fast": "Instructions", "Turbo": "Errors", "Background": "Errors"}  # Run speed -> output verbosity under Auto
+
+def format_state(state, words, pages=None):
+    """Format a packed state snapshot and its non-zero memory words for the log; pages lists the pages words covers when it is not all of memory."""
+    regs = ", ".join([f"{r}={state[REGISTER_SLOTS[r]]}(0x{state[REGISTER_SLOTS[r]]:08X})" for r in REGISTER_NAMES])
+    segs = ", ".join([f"{s}=0x{state[SEGMENT_SLOTS[s]]:08X}" for s in SEGMENT_NAMES])
+    flags = ", ".join([f"{f}={(state[FLAGS_SLOT] >> bit) & 1}" for bit, f in enumerate(['ZF', 'SF', 'CF', 'OF'])])
+    mem_entries = [f"0x{addr:08X}={val}(0x{val:08X})" for addr, val in words]
+    if pages is not None:
+        if not pages:
+            return f"Registers: {regs}; Segments: {segs}; Flags: {flags}; Memory unchanged"
+        return f"Registers: {regs}; Segments: {segs}; Flags: {flags}; Memory pages {','.join(map(str, pages))} changed: {';'.join(mem_entries)}"
+    return f"Registers: {regs}; Segments: {segs}; Flags: {flags}; Memory: {';'.join(mem_entries)}"
 
 # GUI class to create and manage the simulator interface
 class ProcessorGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Pentaur ( 32-bit Pentium Microprocessor Simulator ) ")
-        self.control_unit = ControlUnit()
+        self.control_unit = ControlUnit(object_cache=ObjectCache())
         self.pipeline = Pipeline(self.control_unit)
+        self.initial_snapshot = self.control_unit.snapshot()  # Power-on state restored by Reset
+        self.journal = UndoJournal(self.control_unit)  # Undo records for Step Back
+        self.in_flight = False  # True while an instruction's stages are being animated
+        self._run_after_id = None  # Pending after() callback of run mode
+        self._stage_after_id = None  # Pending after() callback animating the next stage of the current instruction
+        self.profiler = None  # GuestProfiler for the current program while profiling is enabled
+        self.profile_window = None
+        self.host_timers = None  # HostTimers installed while host timing is enabled
+        self.timers_window = None
+        self.cprofile = None  # cProfile.Profile collecting the current run
+        self.worker = None  # ExecutionWorker of a background run in progress
+        self._worker_base = 0  # executed_count when the background run started
+        self._run_base = 0  # executed_count when the current run started
+        self.renderer = RenderScheduler(root)  # Applies display changes at most once per frame
+        self._memory_pending = False  # A memory table refresh is waiting for the next frame
+        self._pending_memory = None
+        self._pending_dirty = None
+        self.executed_count = 0  # Instructions completed, sampled by the speed meter
+        self._state_log_memory = None  # Memory and generation of the last state dump; later dumps list only pages written since
+        self._state_log_generation = 0
+        self._meter_count = 0
+        self._meter_time = time.perf_counter()
         self.step_mode = False
         self.current_instruction_index = 0
         self.instructions = []
         self.labels = {}
+        self.program = None
         self.setup_gui()
+        self.root.after(METER_INTERVAL_MS, self._update_meter)
         logging.info("GUI initialized")
 
     def setup_gui(self):
@@ -44,13 +99,46 @@ class ProcessorGUI:
         self.menu_bar.add_cascade(label="Log", menu=self.log_menu)
         self.log_menu.add_command(label="Open processor.log", command=self.open_log, accelerator="Ctrl+L")
         self.log_menu.add_command(label="Clear processor.log", command=self.clear_log, accelerator="Ctrl+Shift+L")
+        self.log_menu.add_separator()
+        self.debug_log_enabled = tk.BooleanVar(value=False)
+        self.log_menu.add_checkbutton(label="Debug Log (State After Each Instruction)", variable=self.debug_log_enabled, command=self.toggle_debug_log)
 
         # Instruction menu
         self.instruction_menu = tk.Menu(self.menu_bar, tearoff=0, font=("Arial", 10))
         self.menu_bar.add_cascade(label="Instruction", menu=self.instruction_menu)
         self.instruction_menu.add_command(label="Run", command=self.run_instructions, accelerator="Ctrl+R")
         self.instruction_menu.add_command(label="Step", command=self.step_instruction, accelerator="Ctrl+T")
+        self.instruction_menu.add_command(label="Step Back", command=self.step_back, accelerator="Ctrl+B")
         self.instruction_menu.add_command(label="Reset", command=self.reset_program, accelerator="Ctrl+Shift+R")
+        self.instruction_menu.add_command(label="Pause/Resume Background Run", command=self.toggle_pause, accelerator="Ctrl+P")
+        self.instruction_menu.add_command(label="Stop Background Run", command=self.stop_run, accelerator="Ctrl+Shift+S")
+        self.run_speed = tk.StringVar(value="Animated")
+        self.speed_menu = tk.Menu(self.instruction_menu, tearoff=0, font=("Arial", 10))
+        self.instruction_menu.add_cascade(label="Run Speed", menu=self.speed_menu)
+        for speed in RUN_SPEEDS:
+            self.speed_menu.add_radiobutton(label=speed, variable=self.run_speed, value=speed)
+
+        # Memory menu
+        self.memory_menu = tk.Menu(self.menu_bar, tearoff=0, font=("Arial", 10))
+        self.menu_bar.add_cascade(label="Memory", menu=self.memory_menu)
+        self.memory_menu.add_command(label="Load Memory Image", command=self.load_memory_image)
+        self.memory_menu.add_command(label="Dump Memory Image", command=self.dump_memory_image)
+
+        # Profile menu
+        self.profile_enabled = tk.BooleanVar(value=False)
+        self.profile_menu = tk.Menu(self.menu_bar, tearoff=0, font=("Arial", 10))
+        self.menu_bar.add_cascade(label="Profile", menu=self.profile_menu)
+        self.profile_menu.add_checkbutton(label="Enable Profiler", variable=self.profile_enabled, command=self.toggle_profiler)
+        self.profile_menu.add_command(label="Show Profile", command=self.show_profile)
+        self.profile_menu.add_command(label="Reset Profile", command=self.reset_profile)
+        self.profile_menu.add_separator()
+        self.host_timers_enabled = tk.BooleanVar(value=False)
+        self.cprofile_enabled = tk.BooleanVar(value=False)
+        self.meter_enabled = tk.BooleanVar(value=True)
+        self.profile_menu.add_checkbutton(label="Enable Host Timers", variable=self.host_timers_enabled, command=self.toggle_host_timers)
+        self.profile_menu.add_command(label="Show Host Timers", command=self.show_host_timers)
+        self.profile_menu.add_checkbutton(label="cProfile Runs", variable=self.cprofile_enabled)
+        self.profile_menu.add_checkbutton(label="Show Speed Meter", variable=self.meter_enabled, command=self._update_meter_visibility)
 
         # Help menu
         self.help_menu = tk.Menu(self.menu_bar, tearoff=0, font=("Arial", 10))
@@ -69,6 +157,9 @@ class ProcessorGUI:
         self.root.bind("<Control-Shift-L>", lambda e: self.clear_log())
         self.root.bind("<Control-r>", lambda e: self.run_instructions())
         self.root.bind("<Control-t>", lambda e: self.step_instruction())
+        self.root.bind("<Control-b>", lambda e: self.step_back())
+        self.root.bind("<Control-p>", lambda e: self.toggle_pause())
+        self.root.bind("<Control-Shift-S>", lambda e: self.stop_run())
         self.root.bind("<Control-Shift-R>", lambda e: self.reset_program())
         self.root.bind("<Control-h>", lambda e: self.show_help())
         self.root.bind("<Control-i>", lambda e: self.show_about())
@@ -109,13 +200,22 @@ class ProcessorGUI:
         self.input_frame.grid_columnconfigure(1, weight=1)
         self.input_frame.grid_rowconfigure(1, weight=1)
 
-        # Add Run and Step buttons above the input text
+        # Add Run, Step and Step Back buttons above the input text
         self.button_frame = ttk.Frame(self.input_frame)
         self.button_frame.grid(row=0, column=0, columnspan=2, padx=5, pady=5, sticky="ew")
         self.run_button = ttk.Button(self.button_frame, text="Run", command=self.run_instructions)
         self.run_button.grid(row=0, column=0, padx=(0, 5), pady=2)
         self.step_button = ttk.Button(self.button_frame, text="Step", command=self.step_instruction)
         self.step_button.grid(row=0, column=1, padx=(5, 0), pady=2)
+        self.step_back_button = ttk.Button(self.button_frame, text="Step Back", command=self.step_back)
+        self.step_back_button.grid(row=0, column=2, padx=(5, 0), pady=2)
+        self.pause_button = ttk.Button(self.button_frame, text="Pause", command=self.toggle_pause, state="disabled")
+        self.pause_button.grid(row=0, column=3, padx=(5, 0), pady=2)
+        self.stop_button = ttk.Button(self.button_frame, text="Stop", command=self.stop_run, state="disabled")
+        self.stop_button.grid(row=0, column=4, padx=(5, 0), pady=2)
+        ttk.Label(self.button_frame, text="Speed:").grid(row=0, column=5, padx=(15, 2), pady=2)
+        self.speed_box = ttk.Combobox(self.button_frame, textvariable=self.run_speed, values=list(RUN_SPEEDS), state="readonly", width=10)
+        self.speed_box.grid(row=0, column=6, pady=2)
 
         # Line numbers and input text box
         self.line_numbers = tk.Text(self.input_frame, height=15, width=4, wrap="none", state="disabled", font=("Courier", 10), bg="lightgray")
@@ -135,12 +235,24 @@ class ProcessorGUI:
         self.line_numbers.bind("<MouseWheel>", self._sync_mousewheel)
         self._update_line_numbers(None)
 
-        # Output text box
-        self.output_text = tk.Text(self.io_frame, height=15, width=50, state="disabled")
-        self.output_text.grid(row=1, column=0, padx=0, pady=5, sticky="nsew")
-        self.output_scrollbar = ttk.Scrollbar(self.io_frame, orient='vertical', command=self.output_text.yview)
+        # Output console with a verbosity selector
+        self.output_frame = ttk.Frame(self.io_frame)
+        self.output_frame.grid(row=1, column=0, columnspan=2, padx=0, pady=5, sticky="nsew")
+        self.output_frame.grid_rowconfigure(1, weight=1)
+        self.output_frame.grid_columnconfigure(0, weight=1)
+        self.output_toolbar = ttk.Frame(self.output_frame)
+        self.output_toolbar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        ttk.Label(self.output_toolbar, text="Output:").grid(row=0, column=0, padx=(0, 2))
+        self.output_verbosity = tk.StringVar(value="Auto")
+        self.verbosity_box = ttk.Combobox(self.output_toolbar, textvariable=self.output_verbosity, values=["Auto"] + list(VERBOSITY_LEVELS), state="readonly", width=12)
+        self.verbosity_box.grid(row=0, column=1)
+        self.verbosity_box.bind("<<ComboboxSelected>>", lambda e: self._apply_verbosity())
+        self.output_text = tk.Text(self.output_frame, height=15, width=50, state="disabled")
+        self.output_text.grid(row=1, column=0, sticky="nsew")
+        self.output_scrollbar = ttk.Scrollbar(self.output_frame, orient='vertical', command=self.output_text.yview)
         self.output_text.configure(yscrollcommand=self.output_scrollbar.set)
         self.output_scrollbar.grid(row=1, column=1, sticky='ns')
+        self.console = OutputConsole(self.root, self.output_text)
 
         # Left panel for registers, segments, and flags
         self.left_panel = ttk.Frame(self.root)
@@ -183,8 +295,19 @@ class ProcessorGUI:
             self.flags_labels[flag] = label
 
         # Memory display table
-        self.memory_frame = ttk.LabelFrame(self.root, text="Memory (non-zero)")
+        self.memory_frame = ttk.LabelFrame(self.root, text="Memory")
         self.memory_frame.grid(row=1, column=1, rowspan=2, padx=10, pady=10, sticky="nsew")
+        self.memory_toolbar = ttk.Frame(self.memory_frame)
+        self.memory_toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        self.memory_mode = tk.StringVar(value=VIEW_MODES[0])
+        self.memory_mode_box = ttk.Combobox(self.memory_toolbar, textvariable=self.memory_mode, values=list(VIEW_MODES), state="readonly", width=10)
+        self.memory_mode_box.grid(row=0, column=0, padx=(0, 10))
+        self.memory_mode_box.bind("<<ComboboxSelected>>", lambda e: self.memory_viewer.set_mode(self.memory_mode.get()))
+        ttk.Label(self.memory_toolbar, text="Go to:").grid(row=0, column=1, padx=(0, 2))
+        self.memory_goto_entry = ttk.Entry(self.memory_toolbar, width=16)
+        self.memory_goto_entry.grid(row=0, column=2)
+        self.memory_goto_entry.bind("<Return>", lambda e: self.goto_memory())
+        ttk.Button(self.memory_toolbar, text="Go", command=self.goto_memory).grid(row=0, column=3, padx=(5, 0))
         self.memory_tree = ttk.Treeview(self.memory_frame, columns=("addr_dec", "addr_hex", "val_dec", "val_hex"), show='headings', height=12)
         self.memory_tree.heading("addr_dec", text="Addr(dec)")
         self.memory_tree.heading("addr_hex", text="Addr(hex)")
@@ -194,23 +317,33 @@ class ProcessorGUI:
         self.memory_tree.column("addr_hex", width=90, anchor="center")
         self.memory_tree.column("val_dec", width=80, anchor="center")
         self.memory_tree.column("val_hex", width=90, anchor="center")
-        self.memory_tree.grid(row=0, column=0, sticky="nsew")
-        self.memory_frame.grid_rowconfigure(0, weight=1)
+        self.memory_tree.grid(row=1, column=0, sticky="nsew")
+        self.memory_frame.grid_rowconfigure(1, weight=1)
         self.memory_frame.grid_columnconfigure(0, weight=1)
-        self.memory_scrollbar = ttk.Scrollbar(self.memory_frame, orient='vertical', command=self.memory_tree.yview)
-        self.memory_tree.configure(yscrollcommand=self.memory_scrollbar.set)
-        self.memory_scrollbar.grid(row=0, column=1, sticky='ns')
+        self.memory_scrollbar = ttk.Scrollbar(self.memory_frame, orient='vertical')
+        self.memory_scrollbar.grid(row=1, column=1, sticky='ns')
+        # The viewer drives the scrollbar itself: the tree only ever holds the visible rows
+        self.memory_viewer = MemoryViewer(self.memory_tree, self.memory_scrollbar)
+
+        # Status bar with the instructions-per-second meter
+        self.status_frame = ttk.Frame(self.root)
+        self.status_frame.grid(row=2, column=0, padx=10, pady=(0, 5), sticky="ew")
+        self.meter_label = ttk.Label(self.status_frame, text="Speed: 0 inst/s | Executed: 0")
+        self.meter_label.grid(row=0, column=0, sticky='w')
 
     def reset_program(self):
         """Reset the simulator to initial state."""
         if messagebox.askyesno("Confirm Reset", "Are you sure you want to reset the simulator? This will clear input, output, registers, segments, flags, and memory."):
             self.input_text.delete("1.0", tk.END)
             self._update_line_numbers(None)
-            self.output_text.config(state="normal")
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.config(state="disabled")
-            self.control_unit = ControlUnit()
-            self.pipeline = Pipeline(self.control_unit)
+            self.console.clear()
+            self._cancel_run()
+            self.control_unit.restore(self.initial_snapshot)
+            self.pipeline.clear_state()
+            self.journal.clear()
+            self.in_flight = False
+            if self.profiler is not None:
+                self.profiler.reset()
             self.instructions = []
             self.labels = {}
             self.current_instruction_index = 0
@@ -274,8 +407,9 @@ The graphical interface is divided into several sections for ease of use:
 
 - Menu Bar (Top):
   - Program: Save or load assembly programs (Ctrl+S / Ctrl+O).
-  - Log: Open or clear the processor.log file (Ctrl+L / Ctrl+Shift+L).
-  - Instruction: Run all instructions (Ctrl+R), step through one instruction at a time (Ctrl+T), or reset the simulator (Ctrl+Shift+R).
+  - Log: Open or clear the processor.log file (Ctrl+L / Ctrl+Shift+L), or turn on the Debug Log with a state dump after each instruction.
+  - Instruction: Run all instructions (Ctrl+R), step through one instruction at a time (Ctrl+T), undo the last instruction (Ctrl+B), or reset the simulator (Ctrl+Shift+R).
+  - Memory: Load a raw binary (.bin) or hex (.hex) image into memory at a segment:offset address, or dump a memory range to a file.
   - Help: Display this guide (Ctrl+H).
   - About: Show application information (Ctrl+I).
 
@@ -284,7 +418,7 @@ The graphical interface is divided into several sections for ease of use:
 
 - Instruction Input and Output (Right Top):
   - Input Box: Enter assembly instructions line by line. Line numbers are shown on the left. Supports scrolling.
-  - Run and Step Buttons: Quick access to execute all instructions or step through them.
+  - Run, Step and Step Back Buttons: Quick access to execute all instructions, step through them or undo them.
   - Output Box: Displays execution logs, results, errors, and stage-by-stage details.
 
 - State Monitoring (Bottom Left):
@@ -293,7 +427,7 @@ The graphical interface is divided into several sections for ease of use:
   - Flags: Indicates status of ZF (Zero), SF (Sign), CF (Carry), and OF (Overflow) as 0 or 1.
 
 - Memory Display (Bottom Right):
-  - A table listing non-zero memory locations with addresses and values in decimal and hexadecimal. Scrollable for large memory views.
+  - A table listing aligned 32-bit memory words with byte addresses and values in decimal and hexadecimal. The mode box switches between non-zero words and all words; Go to jumps to an address (SEG:offset, base:offset or physical). Only the visible rows are drawn, so large memory contents scroll smoothly.
 
 The window is resizable, and components adjust accordingly.
 
@@ -412,13 +546,18 @@ end: MOV R5, 999          ; R5 = 999
 
 Step 3: Executing Instructions
 - Run (Ctrl+R or Run button): Executes all instructions sequentially. Pipeline stages animate in green.
+- Run Speed (Speed box or Instruction > Run Speed): Animated shows every stage, Fast shortens the animation, Turbo executes as many instructions as fit in about 15 ms per screen refresh without animation, and Background runs the program on a worker thread.
+- Output verbosity (Output box above the console): Stages shows every stage and result, Instructions one line per instruction, Errors only errors and summaries; Auto picks Stages when animating or stepping and fewer lines at the faster speeds. The console keeps the last 2000 lines; processor.log has the full history.
+- Pause/Resume (Ctrl+P) and Stop (Ctrl+Shift+S): Interrupt a Background run, e.g. an endless loop. After Stop, Step continues from the instruction reached.
 - Step (Ctrl+T or Step button): Executes one instruction at a time, showing each pipeline stage.
+- Step Back (Ctrl+B or Step Back button): Undoes the last instruction, restoring registers, flags, ports and memory. Up to 10,000 instructions can be undone; an instruction stopped by an error is rolled back first.
 - Reset (Ctrl+Shift+R): Clears everything to initial state after confirmation.
+- Profile > Enable Profiler: Counts executions per instruction, label region and opcode, and taken/not-taken branches per jump. Profile > Show Profile opens the counts in a panel.
 
 Step 4: Monitoring Execution
 - Output Box: Shows step-by-step results, flags updates, and errors.
 - Registers/Segments/Flags: Update after each instruction.
-- Memory Table: Shows non-zero entries; refresh after execution.
+- Memory Table: Shows non-zero entries (or all words); use Go to with e.g. DS:0x10 to jump to an address.
 - Pipeline Canvas: Highlights active stages.
 
 Step 5: Program Management
@@ -427,16 +566,17 @@ Step 5: Program Management
 
 Step 6: Logging
 - All actions logged to processor.log in the script directory.
+- Log > Debug Log: Also log every pipeline stage and the state after each instruction (only the memory pages written since the previous dump). Much slower; off by default.
 - Open Log (Ctrl+L): View in default editor.
 - Clear Log (Ctrl+Shift+L): Clear file after confirmation.
 
 5. Advanced Features and Tips
-- Memory Addressing: Physical address = segment base + offset (mod 2^32). Use MOVSEG to set bases.
+- Memory Addressing: Physical address = segment base + offset (mod 2^32). Use MOVSEG to set bases. Memory is byte-addressed: LOAD, STORE, PUSH and POP access 32-bit little-endian words, so words at consecutive addresses overlap (use offsets 4 apart).
 - Stack Operations: Set SS and SP first (e.g., MOVSEG SS, 0x1000; MOV SP, 0x100).
 - Jumps: Labels must be defined; infinite loops possible but use Step to debug.
 - I/O Ports: Simulated as a dictionary; values persist until reset.
 - Error Handling: Invalid ops/registers/memory show in output/log.
-- Performance: For large programs, use Run; Step for debugging.
+- Performance: For large programs, use Run at Turbo speed; Step for debugging.
 - Best Practices: Start with simple code, check flags/memory after ops, use hex for addresses.
 
 6.Chartres Cathedral, France
@@ -458,6 +598,162 @@ This simulator is for educational use. Explore, experiment, and learn microproce
         close_button = ttk.Button(help_window, text="Close", command=help_window.destroy)
         close_button.pack(pady=10)
 
+    def toggle_profiler(self):
+        """Start or stop counting executions of the current program."""
+        if self.profile_enabled.get():
+            self.profiler = GuestProfiler(self.program) if self.program is not None else None
+            logging.info("Guest profiler enabled")
+        else:
+            self.profiler = None
+            logging.info("Guest profiler disabled")
+
+    def reset_profile(self):
+        """Zero the profiler counters."""
+        if self.profiler is not None:
+            self.profiler.reset()
+        self._refresh_profile()
+
+    def show_profile(self):
+        """Open the profile panel with counts per instruction, label, opcode and jump."""
+        if self.profile_window is not None and self.profile_window.winfo_exists():
+            self.profile_window.lift()
+            self._refresh_profile()
+            return
+        window = tk.Toplevel(self.root)
+        window.title("Guest Profile")
+        window.geometry("560x420")
+        self.profile_window = window
+        self.profile_summary = ttk.Label(window, text="")
+        self.profile_summary.pack(fill="x", padx=10, pady=(10, 0))
+        notebook = ttk.Notebook(window)
+        notebook.pack(fill="both", expand=True, padx=10, pady=10)
+        self.profile_tables = {}
+        tables = {
+            "Instructions": (("index", "Index", 60), ("instruction", "Instruction", 260), ("count", "Count", 100)),
+            "Labels": (("label", "Label region", 300), ("count", "Count", 100)),
+            "Opcodes": (("opcode", "Opcode", 200), ("count", "Count", 100)),
+            "Jumps": (("index", "Index", 60), ("instruction", "Instruction", 220), ("taken", "Taken", 80), ("not_taken", "Not taken", 80)),
+        }
+        for name, columns in tables.items():
+            tree = ttk.Treeview(notebook, columns=[column for column, heading, width in columns], show='headings')
+            for column, heading, width in columns:
+                tree.heading(column, text=heading)
+                tree.column(column, width=width, anchor="w" if column in ("instruction", "label", "opcode") else "center")
+            notebook.add(tree, text=name)
+            self.profile_tables[name] = tree
+        buttons = ttk.Frame(window)
+        buttons.pack(pady=(0, 10))
+        ttk.Button(buttons, text="Refresh", command=self._refresh_profile).grid(row=0, column=0, padx=5)
+        ttk.Button(buttons, text="Reset", command=self.reset_profile).grid(row=0, column=1, padx=5)
+        ttk.Button(buttons, text="Close", command=window.destroy).grid(row=0, column=2, padx=5)
+        self._refresh_profile()
+
+    def _refresh_profile(self):
+        """Fill the profile panel from the current counters."""
+        if self.profile_window is None or not self.profile_window.winfo_exists():
+            return
+        for tree in self.profile_tables.values():
+            tree.delete(*tree.get_children())
+        if self.profiler is None:
+            self.profile_summary.config(text="Profiler is disabled (Profile > Enable Profiler) or no program is loaded.")
+            return
+        report = self.profiler.report(top=len(self.profiler.program))
+        self.profile_summary.config(text=f"Instructions executed: {report['total']}")
+        for row in report["instructions"]:
+            self.profile_tables["Instructions"].insert("", "end", values=(row["index"] + 1, row["instruction"], row["count"]))
+        for label, count in report["labels"].items():
+            self.profile_tables["Labels"].insert("", "end", values=(label, count))
+        for opcode, count in report["opcodes"].items():
+            self.profile_tables["Opcodes"].insert("", "end", values=(opcode, count))
+        for row in report["jumps"]:
+            self.profile_tables["Jumps"].insert("", "end", values=(row["index"] + 1, row["instruction"], row["taken"], row["not_taken"]))
+
+    def toggle_host_timers(self):
+        """Install or remove the host timers around decoding, pipeline stages, ALU, flags, memory, logging and display updates."""
+        self._stop_worker()  # Wrappers are installed and removed on the main thread only
+        if self.host_timers_enabled.get():
+            self.host_timers = HostTimers()
+            self.host_timers.instrument(self.control_unit, self.pipeline)
+            for method in ("_update_register_display", "_update_segment_display", "_update_memory_display", "update_component_color"):
+                self.host_timers.wrap(self, method, f"gui.{method.lstrip('_')}")
+            self.host_timers.wrap(self.renderer, "flush", "gui.render_flush")
+            logging.info("Host timers enabled")
+        else:
+            self.host_timers.unwrap_all()
+            self.host_timers = None
+            logging.info("Host timers disabled")
+        # Micro-op plans hold the ALU operations they were built with, so rebuild them on the next run
+        self.control_unit.program = None
+
+    def show_host_timers(self):
+        """Open a window with the host time spent per subsystem."""
+        if self.timers_window is None or not self.timers_window.winfo_exists():
+            window = tk.Toplevel(self.root)
+            window.title("Host Timers")
+            self.timers_window = window
+            self.timers_text = tk.Text(window, wrap="none", height=20, width=64, font=("Courier", 10))
+            self.timers_text.pack(fill="both", expand=True, padx=10, pady=10)
+            buttons = ttk.Frame(window)
+            buttons.pack(pady=(0, 10))
+            ttk.Button(buttons, text="Refresh", command=self._refresh_host_timers).grid(row=0, column=0, padx=5)
+            ttk.Button(buttons, text="Reset", command=self.reset_host_timers).grid(row=0, column=1, padx=5)
+            ttk.Button(buttons, text="Close", command=window.destroy).grid(row=0, column=2, padx=5)
+        self.timers_window.lift()
+        self._refresh_host_timers()
+
+    def reset_host_timers(self):
+        """Zero the host timers."""
+        if self.host_timers is not None:
+            self.host_timers.reset()
+        self._refresh_host_timers()
+
+    def _refresh_host_timers(self):
+        """Fill the host timers window from the current totals."""
+        if self.timers_window is None or not self.timers_window.winfo_exists():
+            return
+        self.timers_text.config(state="normal")
+        self.timers_text.delete("1.0", tk.END)
+        if self.host_timers is None:
+            self.timers_text.insert(tk.END, "Host timers are disabled (Profile > Enable Host Timers).")
+        else:
+            self.timers_text.insert(tk.END, format_timers(self.host_timers.report()))
+        self.timers_text.config(state="disabled")
+
+    def _start_cprofile(self):
+        """Start collecting a cProfile of this run if enabled."""
+        if self.cprofile_enabled.get() and self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def _stop_cprofile(self):
+        """Stop the cProfile of the current run, save it next to processor.log and show the top functions."""
+        if self.cprofile is None:
+            return
+        self.cprofile.disable()
+        path = os.path.join(os.path.dirname(get_log_file_path()), "run.prof")
+        self.cprofile.dump_stats(path)
+        self.console.write(f"cProfile stats saved to {path}\n{format_stats(self.cprofile, 15)}")
+        self.cprofile = None
+        logging.info("cProfile stats saved to %s", path)
+
+    def _update_meter(self):
+        """Refresh the instructions-per-second meter and schedule the next refresh."""
+        now = time.perf_counter()
+        if self.meter_enabled.get():
+            rate = (self.executed_count - self._meter_count) / (now - self._meter_time)
+            speed = f"{rate / 1e6:.2f} MIPS" if rate >= 1e6 else f"{rate:,.0f} inst/s" if rate >= 10 else f"{rate:.1f} inst/s"
+            self.meter_label.config(text=f"Speed: {speed} | Executed: {self.executed_count}")
+        self._meter_count = self.executed_count
+        self._meter_time = now
+        self.root.after(METER_INTERVAL_MS, self._update_meter)
+
+    def _update_meter_visibility(self):
+        """Show or hide the speed meter."""
+        if self.meter_enabled.get():
+            self.meter_label.grid()
+        else:
+            self.meter_label.grid_remove()
+
     def show_about(self):
         """Display the about window."""
         about_window = tk.Toplevel(self.root)
@@ -485,40 +781,47 @@ Good luck!
     def update_component_color(self, stage, color):
         """Update the color of a pipeline stage in the canvas."""
         try:
-            self.canvas.itemconfig(self.components[stage], fill=color)
-            self.root.update_idletasks()
+            self.renderer.set_fill(self.canvas, self.components[stage], color)
         except KeyError:
             logging.error(f"Invalid stage {stage} for visualization")
             raise ValueError(f"Visualization error: Stage {stage} not found")
 
     def _update_segment_display(self):
         """Update segment registers and flags display."""
+        self._render_segments(self.control_unit.state_view())
+
+    def _render_segments(self, state):
+        """Schedule the segment and flag labels for a packed state; unchanged labels are left alone."""
+        set_text = self.renderer.set_text
         for seg, label in self.segment_labels.items():
-            base = self.control_unit.segment_regs.get_base(seg)
-            label.config(text=f"{seg}: {base} (0x{base:08X})")
-        for flag, label in self.flags_labels.items():
-            value = getattr(self.control_unit.flags, flag)
-            label.config(text=f"{flag}: {int(value)}")
+            base = state[SEGMENT_SLOTS[seg]]
+            set_text(label, f"{seg}: {base} (0x{base:08X})")
+        for bit, flag in enumerate(['ZF', 'SF', 'CF', 'OF']):
+            set_text(self.flags_labels[flag], f"{flag}: {(state[FLAGS_SLOT] >> bit) & 1}")
 
     def clear_log(self):
         """Clear the processor.log file after user confirmation."""
         if messagebox.askyesno("Confirm", "Are you sure you want to clear the contents of processor.log?"):
             try:
-                with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log'), 'w') as f:
+                level = logging.getLogger().level
+                stop_logging()  # Flush the writer thread before truncating its file
+                with open(get_log_file_path(), 'w') as f:
                     f.write('')
+                setup_logging(get_log_file_path(), level)
                 messagebox.showinfo("Success", "processor.log cleared successfully")
                 logging.info("processor.log cleared by user")
-                logging.basicConfig(
-                    filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log'),
-                    level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s',
-                    force=True
-                )
                 logging.info("Logging reinitialized after clearing processor.log")
             except Exception as e:
                 messagebox.showerror("Error", f"Error clearing processor.log: {str(e)}")
                 logging.error(f"Error clearing processor.log: {str(e)}")
 
+    def toggle_debug_log(self):
+        """Switch the log between INFO and DEBUG; DEBUG adds per-stage records and a state dump after each instruction."""
+        level = logging.DEBUG if self.debug_log_enabled.get() else logging.INFO
+        logging.getLogger().setLevel(level)
+        self._state_log_memory = None  # The first dump after enabling lists all of memory
+        logging.info("Log level set to %s", logging.getLevelName(level))
+
     def open_log(self):
         """Open the processor.log file in the default editor."""
         try:
@@ -533,29 +836,19 @@ Good luck!
             logging.error(f"Error opening processor.log: {str(e)}")
 
     def parse_labels(self):
-        """Parse labels from instructions for jump operations."""
-        self.labels = {}
-        temp_instructions = []
-        for line in self.instructions:
-            match = re.match(r'^\s*(\w+)\s*:\s*(.*)$', line)
-            if match:
-                label = match.group(1)
-                instruction = match.group(2).strip()
-                if instruction:
-                    temp_instructions.append(instruction)
-                    self.labels[label] = len(temp_instructions) - 1
-                else:
-                    self.labels[label] = len(temp_instructions)
-            else:
-                temp_instructions.append(line)
-        self.instructions = temp_instructions
-        self.control_unit.labels = self.labels
+        """Decode the input text once per change and collect its labels for jump operations."""
+        program = self.control_unit.load_program(self.input_text.get("1.0", tk.END))
+        if program is not self.program:
+            self.journal.clear()  # Undo records refer to the previous program's instructions
+            self.profiler = GuestProfiler(program) if self.profile_enabled.get() else None
+        self.program = program
+        self.instructions = self.program.instructions
+        self.labels = self.program.labels
 
     def step_instruction(self):
         """Execute one instruction with pipeline visualization."""
         try:
-            lines = self.input_text.get("1.0", tk.END).splitlines()
-            self.instructions = [line for line in lines if re.sub(r'\s*(;.*|//.*)$', '', line).strip()]
+            self._cancel_run()  # An animated run or step in progress is interrupted at its instruction's start
             self.parse_labels()
             if not self.instructions:
                 messagebox.showinfo("Info", "No valid instructions to step through.")
@@ -563,60 +856,60 @@ Good luck!
             if self.current_instruction_index >= len(self.instructions):
                 self.current_instruction_index = 0
             self.step_mode = True
-            self.output_text.config(state="normal")
-            if self.output_text.get("1.0", tk.END).strip() == "":
-                self.output_text.insert(tk.END, f"Log file location: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log')}\n")
+            self._apply_verbosity()
+            if self.console.is_empty():
+                self.console.write(f"Log file location: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log')}\n")
             self._step_next_instruction()
         except Exception as e:
-            self.output_text.config(state="normal")
-            self.output_text.insert(tk.END, f"Error: {str(e)}\n")
-            self.output_text.config(state="disabled")
+            self.console.write(f"Error: {str(e)}\n")
             messagebox.showerror("Error", f"Error stepping instruction: {str(e)}")
             logging.error(f"Error stepping instruction: {str(e)}")
 
     def _step_next_instruction(self):
         """Execute the next instruction in step mode."""
         if self.current_instruction_index >= len(self.instructions):
-            self.output_text.insert(tk.END, "All instructions executed.\n")
-            self.output_text.config(state="disabled")
+            self.console.write("All instructions executed.\n")
             logging.info("All instructions executed in step mode")
             return
 
         instruction = self.instructions[self.current_instruction_index]
         self.pipeline.clear_state()
+        self.journal.begin(self.current_instruction_index)
+        self.in_flight = True
         self.current_instruction = instruction
-        self.output_text.insert(tk.END, f"Stepping instruction #{self.current_instruction_index + 1}: {instruction}\n")
+        self.console.write(f"Stepping instruction #{self.current_instruction_index + 1}: {instruction}\n", INSTRUCTIONS)
         self.update_component_color("Fetch", "lightgreen")
-        self.output_text.insert(tk.END, f"Stage Fetch for {instruction}\n")
+        self.console.write(f"Stage Fetch for {instruction}\n", STAGES)
         self.pipeline.perform_stage("Fetch", None)
-        self.root.after(300, lambda: self._after_fetch_step(instruction))
+        self._schedule_stage(300, lambda: self._after_fetch_step(instruction))
 
     def _after_fetch_step(self, instruction):
         """Handle post-fetch stage in step mode."""
         self.update_component_color("Fetch", "lightblue")
         self.update_component_color("Decode", "lightgreen")
-        self.output_text.insert(tk.END, f"Stage Decode for {instruction}\n")
+        self.console.write(f"Stage Decode for {instruction}\n", STAGES)
         try:
-            parsed = self.control_unit.decode_instruction(instruction)
-            if parsed[0] is None:
-                self.output_text.insert(tk.END, "Skipped (no-op or blank)\n")
+            parsed = self.program.fetch(self.current_instruction_index)
+            if parsed is None:
+                self.console.write("Skipped (no-op or blank)\n", STAGES)
                 self.update_component_color("Decode", "lightblue")
                 self.current_instruction_index += 1
+                self._end_instruction()
                 return
             self.current_parsed = parsed
             self.pipeline.perform_stage("Decode", parsed)
-            self.root.after(300, lambda: self._after_decode_step(instruction))
+            self._schedule_stage(300, lambda: self._after_decode_step(instruction))
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error: {str(e)}\n")
+            self.console.write(f"Error: {str(e)}\n")
             self.update_component_color("Decode", "lightblue")
             logging.error(f"Error executing instruction '{instruction}': {str(e)}")
             self.current_instruction_index += 1
+            self._end_instruction()
 
     def _after_decode_step(self, instruction):
         """Handle post-decode stage in step mode."""
         self.update_component_color("Decode", "lightblue")
-        op, dest, src1, src2 = self.current_parsed
-        remaining_stages = self.pipeline.get_remaining_stages(op)
+        remaining_stages = self.pipeline.get_remaining_stages(self.current_parsed)
         self.remaining_stages = remaining_stages
         self.remaining_index = 0
         if not remaining_stages:
@@ -629,109 +922,361 @@ Good luck!
         if self.remaining_index < len(self.remaining_stages):
             stage = self.remaining_stages[self.remaining_index]
             self.update_component_color(stage, "lightgreen")
-            self.output_text.insert(tk.END, f"Stage {stage} for {self.current_instruction}\n")
-            self.pipeline.perform_stage(stage, self.current_parsed)
+            self.console.write(f"Stage {stage} for {self.current_instruction}\n", STAGES)
+            if not self._perform_animated_stage(stage):
+                return
             last_result = self.pipeline.results[-1] if self.pipeline.results else None
             if last_result:
-                self.output_text.insert(tk.END, f"Result: {last_result}\n")
-            self.root.after(300, lambda s=stage: self._end_remaining_stage_step(s))
+                self.console.write(f"Result: {last_result}\n", STAGES)
+            self._schedule_stage(300, lambda: self._end_remaining_stage_step(stage))
         else:
             self._finish_instruction()
 
+    def _perform_animated_stage(self, stage):
+        """Run one stage of the current instruction; on an execution error, report it and stop."""
+        try:
+            self.pipeline.perform_stage(stage, self.current_parsed)
+            return True
+        except ValueError as e:
+            self.console.write(f"Error: {str(e)}\n")
+            self.console.write("Execution stopped; use Step Back to undo the partial instruction.\n")
+            self.update_component_color(stage, "lightblue")
+            logging.error(f"Error executing instruction '{self.current_instruction}': {str(e)}")
+            self.in_flight = False  # The journal record stays open so Step Back rolls it back
+            self.step_mode = True
+            return False
+
+    def _end_instruction(self):
+        """Close the undo record of the instruction that just finished or was skipped."""
+        self.journal.end()
+        self.in_flight = False
+
+    def _apply_verbosity(self):
+        """Set the console verbosity from the selector; Auto hides per-stage lines at the faster run speeds."""
+        choice = self.output_verbosity.get()
+        if choice == "Auto":
+            choice = AUTO_VERBOSITY["Animated" if self.step_mode else self.run_speed.get()]
+        self.console.verbosity = VERBOSITY_LEVELS[choice]
+
+    def _delay(self, milliseconds):
+        """Scale a run-mode animation delay by the selected run speed."""
+        return int(milliseconds * RUN_SPEEDS[self.run_speed.get()])
+
+    def _schedule_run(self, delay):
+        """Schedule the next instruction of run mode, remembering the callback so it can be cancelled."""
+        self._run_after_id = self.root.after(self._delay(delay), self._run_next_instruction)
+
+    def _schedule_stage(self, delay, callback):
+        """Schedule the next stage of the animated instruction, remembering the callback so it can be cancelled."""
+        def fire():
+            self._stage_after_id = None
+            callback()
+        self._stage_after_id = self.root.after(delay, fire)
+
+    def _cancel_run(self):
+        """Cancel a background run or every pending run-mode and stage callback, leaving the simulator in step mode between instructions."""
+        self._stop_worker()
+        if self._run_after_id is not None:
+            self.root.after_cancel(self._run_after_id)
+            self._run_after_id = None
+        if self._stage_after_id is not None:
+            self.root.after_cancel(self._stage_after_id)
+            self._stage_after_id = None
+        if self.in_flight:
+            # Undo the stages the interrupted instruction already performed
+            self.journal.step_back()
+            self.in_flight = False
+            self.pipeline.clear_state()
+            for stage in self.components:
+                self.update_component_color(stage, "lightblue")
+            self._update_register_display()
+            self._update_segment_display()
+            self._update_memory_display()
+        self.step_mode = True
+        self._stop_cprofile()
+
+    def step_back(self):
+        """Undo the last executed instruction using the undo journal."""
+        if self.in_flight:
+            messagebox.showinfo("Info", "Wait for the current instruction to finish before stepping back.")
+            return
+        self._cancel_run()
+        index = self.journal.step_back()
+        if index is None:
+            self.console.write("Nothing to step back to.\n")
+        else:
+            self.current_instruction_index = index
+            self.pipeline.clear_state()
+            for stage in self.components:
+                self.update_component_color(stage, "lightblue")
+            self._update_register_display()
+            self._update_segment_display()
+            self._update_memory_display()
+            instruction = self.instructions[index] if index < len(self.instructions) else ""
+            self.console.write(f"Stepped back to instruction #{index + 1}: {instruction}\n")
+            logging.info("Stepped back to instruction %d", index + 1)
+
     def _end_remaining_stage_step(self, stage):
         """End a pipeline stage in step mode."""
         self.update_component_color(stage, "lightblue")
         self.remaining_index += 1
         if self.remaining_index < len(self.remaining_stages):
-            self.root.after(100, self._animate_remaining_step)
+            self._schedule_stage(100, self._animate_remaining_step)
         else:
             self._finish_instruction()
 
+    def _complete_instruction(self):
+        """Count and log the instruction that just executed, then advance to the next one or the jump target."""
+        self.executed_count += 1
+        if self.profiler is not None:
+            self.profiler.counts[self.current_instruction_index] += 1
+            if self.control_unit.jump_to is not None:
+                self.profiler.taken[self.current_instruction_index] += 1
+        if logging.root.isEnabledFor(logging.DEBUG):
+            # Per-instruction records would otherwise wait on the bounded log queue at Turbo speed
+            logging.debug("Executed: %s", self.current_instruction)
+            self._log_full_state(self.current_instruction)
+        self.current_instruction_index += 1
+        if self.control_unit.jump_to is not None:
+            self.current_instruction_index = self.control_unit.jump_to
+            self.control_unit.jump_to = None
+        self._end_instruction()
+
     def _finish_instruction(self):
         """Complete instruction execution and update state."""
-        logging.info(f"Executed: {self.current_instruction}")
-        self._log_full_state(self.current_instruction)
+        self._complete_instruction()
         self._update_register_display()
         self._update_segment_display()
         self._update_memory_display()
-        self.output_text.insert(tk.END, f"Instruction completed.\n")
-        self.current_instruction_index += 1
-        if self.control_unit.jump_to is not None:
-            self.current_instruction_index = self.control_unit.jump_to
-            self.control_unit.jump_to = None
+        self.console.write(f"Instruction completed.\n", INSTRUCTIONS)
         if not self.step_mode:
-            self.root.after(200, self._run_next_instruction)
+            self._schedule_run(200)
 
     def run_instructions(self):
         """Execute all instructions with pipeline visualization."""
         try:
-            lines = self.input_text.get("1.0", tk.END).splitlines()
-            self.instructions = [line for line in lines if re.sub(r'\s*(;.*|//.*)$', '', line).strip()]
+            self._cancel_run()  # A run already in progress is replaced by this one
             self.parse_labels()
             if not self.instructions:
-                self.output_text.insert(tk.END, "No valid instructions to run.\n")
-                self.output_text.config(state="disabled")
+                self.console.write("No valid instructions to run.\n")
                 logging.info("No valid instructions provided")
                 messagebox.showinfo("Info", "No valid instructions to run.")
                 return
             self.current_instruction_index = 0
             self.step_mode = False
-            self.output_text.config(state="normal")
-            self.output_text.delete("1.0", tk.END)
-            self.output_text.insert(tk.END, f"Log file location: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log')}\n")
-            self._run_next_instruction()
+            self._run_base = self.executed_count
+            self._apply_verbosity()
+            self.console.clear()
+            self.console.write(f"Log file location: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'processor.log')}\n")
+            self._start_cprofile()
+            if self.run_speed.get() == "Background":
+                self._start_worker()
+            elif self.run_speed.get() == "Turbo":
+                self._run_turbo_slice()
+            else:
+                self._run_next_instruction()
         except Exception as e:
-            self.output_text.config(state="normal")
-            self.output_text.insert(tk.END, f"Error: {str(e)}\n")
-            self.output_text.config(state="disabled")
+            self.console.write(f"Error: {str(e)}\n")
             messagebox.showerror("Error", f"Error executing instructions: {str(e)}")
             logging.error(f"Error executing instructions: {str(e)}")
 
     def _run_next_instruction(self):
         """Execute the next instruction in run mode."""
+        self._run_after_id = None
         if self.current_instruction_index >= len(self.instructions):
-            self.output_text.insert(tk.END, "Instructions executed successfully\n")
-            self.output_text.config(state="disabled")
-            logging.info("Instructions executed successfully")
+            self.console.write("Instructions executed successfully\n")
+            self._stop_cprofile()
+            logging.info("Instructions executed successfully: %d instructions", self.executed_count - self._run_base)
             return
 
         instruction = self.instructions[self.current_instruction_index]
         self.pipeline.clear_state()
+        self.journal.begin(self.current_instruction_index)
+        self.in_flight = True
         self.current_instruction = instruction
-        self.output_text.insert(tk.END, f"Running instruction #{self.current_instruction_index + 1}: {instruction}\n")
+        self.console.write(f"Running instruction #{self.current_instruction_index + 1}: {instruction}\n", INSTRUCTIONS)
         self.update_component_color("Fetch", "lightgreen")
-        self.output_text.insert(tk.END, f"Stage Fetch for {instruction}\n")
+        self.console.write(f"Stage Fetch for {instruction}\n", STAGES)
         self.pipeline.perform_stage("Fetch", None)
-        self.root.after(300, lambda: self._after_fetch(instruction))
+        self._schedule_stage(self._delay(300), lambda: self._after_fetch(instruction))
+
+    def _start_worker(self):
+        """Run the program on a worker thread; the GUI only renders the snapshots it publishes."""
+        # The compiled engine is fastest; with host timers on, the pipeline engine keeps the stage timers meaningful
+        engine = "pipeline" if self.host_timers is not None else "compiled"
+        runner = Runner(self.program.source, engine=engine, max_instructions=sys.maxsize, control_unit=self.control_unit, profiler=self.profiler)
+        runner.pipeline = self.pipeline
+        runner.index = self.current_instruction_index
+        self.pipeline.clear_state()
+        self.journal.clear()  # Background runs are not journaled, so older records no longer apply
+        profile = cProfile.Profile() if self.cprofile_enabled.get() else None
+        self.cprofile = profile
+        self.worker = ExecutionWorker(runner, profile)
+        self._worker_base = self.executed_count
+        self.pause_button.config(state="normal", text="Pause")
+        self.stop_button.config(state="normal")
+        self.console.write(f"Running in the background ({engine} engine); use Pause or Stop to interrupt.\n")
+        logging.info("Background run started with the %s engine", engine)
+        self.worker.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll_worker)
+
+    def _poll_worker(self):
+        """Render the latest snapshot of the background run and report its errors; finishes the run once it is done."""
+        worker = self.worker
+        if worker is None:
+            return
+        update = None
+        while not worker.updates.empty():
+            update = worker.updates.get()
+            for error in update.errors:
+                self.console.write(f"Error in instruction #{error['index'] + 1} '{error['instruction']}': {error['error']}\n")
+                logging.error("Error executing instruction '%s': %s", error['instruction'], error['error'])
+        if update is not None:
+            self._render_update(update)
+            if update.done:
+                self._finish_worker(update)
+                return
+        self.root.after(POLL_INTERVAL_MS, self._poll_worker)
+
+    def _render_update(self, update):
+        """Show a RunUpdate in the register, segment, flag and memory displays."""
+        self._render_registers(update.state)
+        self._render_segments(update.state)
+        self._update_memory_display(update.memory, update.dirty_pages)
+        self.executed_count = self._worker_base + update.executed
+
+    def _finish_worker(self, update):
+        """Join the finished worker and hand the machine back to the GUI."""
+        self.worker.join()
+        self.worker = None
+        self.pause_button.config(state="disabled", text="Pause")
+        self.stop_button.config(state="disabled")
+        self.current_instruction_index = update.index
+        self.control_unit.jump_to = None
+        self._update_register_display()
+        self._update_segment_display()
+        self._update_memory_display(None, ())  # The live memory matches the last snapshot
+        if update.status == "completed":
+            self.console.write(f"Instructions executed successfully ({update.executed} instructions)\n")
+        elif update.status == "stopped":
+            self.console.write(f"Stopped after {update.executed} instructions, at instruction #{update.index + 1}; Step continues from there.\n")
+            self.step_mode = True
+        else:
+            self.console.write(f"Execution stopped after {update.executed} instructions.\n")
+            self.step_mode = True
+        logging.info("Background run ended: %s after %d instructions", update.status, update.executed)
+        self._stop_cprofile()
+
+    def _stop_worker(self):
+        """Stop a background run and wait for it, so the GUI can use the machine again."""
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker.join()
+            self._poll_worker()
+
+    def toggle_pause(self):
+        """Pause or resume the background run."""
+        worker = self.worker
+        if worker is None:
+            return
+        if worker.paused:
+            worker.resume()
+            self.pause_button.config(text="Pause")
+            self.console.write("Resumed.\n")
+        else:
+            worker.pause()
+            self.pause_button.config(text="Resume")
+            self.console.write("Paused.\n")
+
+    def stop_run(self):
+        """Stop the background run, keeping the state it reached."""
+        self._stop_worker()
+
+    def _run_turbo_slice(self):
+        """Execute instructions without animation for one time slice, then refresh the displays once and yield to Tk."""
+        self._run_after_id = None
+        deadline = time.perf_counter() + TURBO_SLICE_SECONDS
+        count = len(self.instructions)
+        running = True
+        while running and self.current_instruction_index < count:
+            running = self._execute_unanimated()
+            if time.perf_counter() >= deadline:
+                break
+        self._update_register_display()
+        self._update_segment_display()
+        self._update_memory_display()
+        if not running:
+            self._stop_cprofile()
+            logging.info("Run stopped after %d instructions", self.executed_count - self._run_base)
+        elif self.current_instruction_index >= count:
+            self._run_next_instruction()  # Reports completion
+        else:
+            self._run_after_id = self.root.after(1, self._run_turbo_slice)
+
+    def _execute_unanimated(self):
+        """Run the current instruction through its pipeline stages like run mode, minus the animation; returns False if execution stopped."""
+        index = self.current_instruction_index
+        instruction = self.instructions[index]
+        self.current_instruction = instruction
+        pipeline = self.pipeline
+        pipeline.clear_state()
+        self.journal.begin(index)
+        pipeline.perform_stage("Fetch", None)
+        try:
+            parsed = self.program.fetch(index)
+            if parsed is None:
+                self.current_instruction_index += 1
+                self._end_instruction()
+                return True
+            pipeline.perform_stage("Decode", parsed)
+        except Exception as e:
+            self.console.write(f"Error in instruction #{index + 1} '{instruction}': {str(e)}\n")
+            logging.error(f"Error executing instruction '{instruction}': {str(e)}")
+            self.current_instruction_index += 1
+            self._end_instruction()
+            return True
+        self.current_parsed = parsed
+        try:
+            for stage in pipeline.get_remaining_stages(parsed):
+                pipeline.perform_stage(stage, parsed)
+        except ValueError as e:
+            self.console.write(f"Error in instruction #{index + 1} '{instruction}': {str(e)}\n")
+            self.console.write("Execution stopped; use Step Back to undo the partial instruction.\n")
+            logging.error(f"Error executing instruction '{instruction}': {str(e)}")
+            self.step_mode = True  # The journal record stays open so Step Back rolls it back
+            return False
+        self._complete_instruction()
+        return True
 
     def _after_fetch(self, instruction):
         """Handle post-fetch stage in run mode."""
         self.update_component_color("Fetch", "lightblue")
         self.update_component_color("Decode", "lightgreen")
-        self.output_text.insert(tk.END, f"Stage Decode for {instruction}\n")
+        self.console.write(f"Stage Decode for {instruction}\n", STAGES)
         try:
-            parsed = self.control_unit.decode_instruction(instruction)
-            if parsed[0] is None:
-                self.output_text.insert(tk.END, "Skipped (no-op or blank)\n")
+            parsed = self.program.fetch(self.current_instruction_index)
+            if parsed is None:
+                self.console.write("Skipped (no-op or blank)\n", STAGES)
                 self.update_component_color("Decode", "lightblue")
                 self.current_instruction_index += 1
-                self.root.after(200, self._run_next_instruction)
+                self._end_instruction()
+                self._schedule_run(200)
                 return
             self.current_parsed = parsed
             self.pipeline.perform_stage("Decode", parsed)
-            self.root.after(300, lambda: self._after_decode(instruction))
+            self._schedule_stage(self._delay(300), lambda: self._after_decode(instruction))
         except Exception as e:
-            self.output_text.insert(tk.END, f"Error: {str(e)}\n")
+            self.console.write(f"Error: {str(e)}\n")
             self.update_component_color("Decode", "lightblue")
             logging.error(f"Error executing instruction '{instruction}': {str(e)}")
             self.current_instruction_index += 1
-            self.root.after(200, self._run_next_instruction)
+            self._end_instruction()
+            self._schedule_run(200)
 
     def _after_decode(self, instruction):
         """Handle post-decode stage in run mode."""
         self.update_component_color("Decode", "lightblue")
-        op, dest, src1, src2 = self.current_parsed
-        remaining_stages = self.pipeline.get_remaining_stages(op)
+        remaining_stages = self.pipeline.get_remaining_stages(self.current_parsed)
         self.remaining_stages = remaining_stages
         self.remaining_index = 0
         if not remaining_stages:
@@ -744,12 +1289,13 @@ Good luck!
         if self.remaining_index < len(self.remaining_stages):
             stage = self.remaining_stages[self.remaining_index]
             self.update_component_color(stage, "lightgreen")
-            self.output_text.insert(tk.END, f"Stage {stage} for {self.current_instruction}\n")
-            self.pipeline.perform_stage(stage, self.current_parsed)
+            self.console.write(f"Stage {stage} for {self.current_instruction}\n", STAGES)
+            if not self._perform_animated_stage(stage):
+                return
             last_result = self.pipeline.results[-1] if self.pipeline.results else None
             if last_result:
-                self.output_text.insert(tk.END, f"Result: {last_result}\n")
-            self.root.after(300, lambda s=stage: self._end_remaining_stage(s))
+                self.console.write(f"Result: {last_result}\n", STAGES)
+            self._schedule_stage(self._delay(300), lambda: self._end_remaining_stage(stage))
         else:
             self._finish_instruction()
 
@@ -760,30 +1306,69 @@ Good luck!
         if self.remaining_index >= len(self.remaining_stages):
             self._finish_instruction()
         else:
-            self.root.after(100, self._animate_remaining)
+            self._schedule_stage(self._delay(100), self._animate_remaining)
 
     def _update_register_display(self):
         """Update register display with current values."""
-        for reg, label in self.register_labels.items():
-            val = self.control_unit.register_file.read(reg)
-            label.config(text=f"{reg}: {val} (0x{val:08X})")
+        self._render_registers(self.control_unit.state_view())
 
-    def _update_memory_display(self):
-        """Update memory table with non-zero values."""
-        for item in self.memory_tree.get_children():
-            self.memory_tree.delete(item)
-        mem = self.control_unit.memory.memory
-        for addr, val in enumerate(mem):
-            if val != 0:
-                self.memory_tree.insert("", "end", values=(str(addr), f"0x{addr:08X}", str(val), f"0x{val:08X}"))
+    def _render_registers(self, state):
+        """Schedule the register labels for a packed state; unchanged labels are left alone."""
+        set_text = self.renderer.set_text
+        for reg, label in self.register_labels.items():
+            val = state[REGISTER_SLOTS[reg]]
+            set_text(label, f"{reg}: {val} (0x{val:08X})")
+
+    def _update_memory_display(self, memory=None, dirty_pages=None):
+        """Refresh the visible rows of the memory table from memory (default: the live memory) at the next frame."""
+        if self._memory_pending:
+            # Coalesce with the refresh already waiting: the pages changed since the table was drawn are the union
+            if dirty_pages is None or self._pending_dirty is None:
+                self._pending_dirty = None
+            else:
+                self._pending_dirty.update(dirty_pages)
+        else:
+            self._pending_dirty = None if dirty_pages is None else set(dirty_pages)
+            self._memory_pending = True
+            self.renderer.call("memory", self._flush_memory_display)
+        self._pending_memory = memory if memory is not None else self.control_unit.memory
+
+    def _flush_memory_display(self):
+        """Apply the pending memory table refresh."""
+        self._memory_pending = False
+        self.memory_viewer.show(self._pending_memory, self._pending_dirty)
+        self._pending_memory = None
+
+    def goto_memory(self):
+        """Scroll the memory table to the address in the Go to box (SEG:offset, base:offset or physical)."""
+        text = self.memory_goto_entry.get().strip()
+        if not text:
+            return
+        try:
+            self.memory_viewer.goto(self.control_unit.resolve_address(text))
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
 
     def _log_full_state(self, instruction):
-        """Log the full processor state after an instruction."""
-        regs = ", ".join([f"{r}={self.control_unit.register_file.read(r)}(0x{self.control_unit.register_file.read(r):08X})" for r in self.control_unit.register_file.registers])
-        segs = ", ".join([f"{s}=0x{self.control_unit.segment_regs.get_base(s):08X}" for s in self.control_unit.segment_regs.segments])
-        flags = ", ".join([f"{f}={int(getattr(self.control_unit.flags, f))}" for f in ['ZF', 'SF', 'CF', 'OF']])
-        mem_entries = [f"0x{addr:08X}={val}(0x{val:08X})" for addr, val in enumerate(self.control_unit.memory.memory) if val != 0]
-        logging.info(f"STATE after '{instruction}': Registers: {regs}; Segments: {segs}; Flags: {flags}; Memory: {';'.join(mem_entries)}")
+        """Log the full processor state after an instruction; the text is built on the log writer thread."""
+        if not logging.root.isEnabledFor(logging.DEBUG):
+            return
+        # Copy the packed state and the changed words now; formatting them is deferred
+        state = self.control_unit.state_view().tolist()
+        memory = self.control_unit.memory
+        if memory is not self._state_log_memory:
+            pages = None
+            words = list(memory.nonzero_words())
+        else:
+            pages = memory.dirty_pages(self._state_log_generation)
+            nonzero = memory.nonzero
+            words = []
+            for page in pages:
+                start, end = memory.page_range(page)
+                words += [(address, memory.read(address)) for address in range(start, min(end, memory.size - 3), 4) if address in nonzero]
+        self._state_log_memory = memory
+        self._state_log_generation = memory.generation
+        logging.debug("STATE after '%s': %s", instruction, LazyMessage(format_state, state, words, pages))
 
     def save_program(self):
         """Save the input program to a file."""
@@ -813,4 +1398,45 @@ Good luck!
                 self._update_line_numbers(None)
         except Exception as e:
             messagebox.showerror("Error", f"Error loading program: {str(e)}")
-            logging.error(f"Error loading program: {str(e)}")
\ No newline at end of file
+            logging.error(f"Error loading program: {str(e)}")
+
+    def load_memory_image(self):
+        """Load a raw binary or hex image file into memory at a segment:offset address."""
+        try:
+            file_path = filedialog.askopenfilename(filetypes=[("Binary images", "*.bin"), ("Hex images", "*.hex"), ("All files", "*.*")])
+            if not file_path:
+                return
+            address = simpledialog.askstring("Load Memory Image", "Load address (SEG:offset, base:offset or physical):", initialvalue="DS:0x0", parent=self.root)
+            if not address:
+                return
+            self._stop_worker()
+            physical_address = self.control_unit.resolve_address(address)
+            loaded = self.control_unit.memory.load_image(file_path, physical_address)
+            self.journal.clear()  # Image loads are not journaled, so older records no longer apply
+            self._update_memory_display()
+            messagebox.showinfo("Success", f"Loaded {loaded} bytes at 0x{physical_address:08X}")
+            logging.info(f"Memory image {file_path} loaded: {loaded} bytes at 0x{physical_address:08X}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error loading memory image: {str(e)}")
+            logging.error(f"Error loading memory image: {str(e)}")
+
+    def dump_memory_image(self):
+        """Dump a memory range to a raw binary or hex image file."""
+        try:
+            address = simpledialog.askstring("Dump Memory Image", "Start address (SEG:offset, base:offset or physical):", initialvalue="DS:0x0", parent=self.root)
+            if not address:
+                return
+            length = simpledialog.askstring("Dump Memory Image", "Length in bytes:", initialvalue="0x100", parent=self.root)
+            if not length:
+                return
+            physical_address = self.control_unit.resolve_address(address)
+            length = int(length, 0)
+            file_path = filedialog.asksaveasfilename(defaultextension=".bin", filetypes=[("Binary images", "*.bin"), ("Hex images", "*.hex")])
+            if not file_path:
+                return
+            self.control_unit.memory.dump_image(file_path, physical_address, length)
+            messagebox.showinfo("Success", f"Dumped {length} bytes from 0x{physical_address:08X}")
+            logging.info(f"Memory dumped to {file_path}: {length} bytes from 0x{physical_address:08X}")
+        except Exception as e:
+            messagebox.showerror("Error", f"Error dumping memory image: {str(e)}")
+            logging.error(f"Error dumping memory image: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,100 @@
+import cProfile
+import io
+import logging
+import pstats
+import time
+
+# Wall-clock timers for simulator subsystems, installed by wrapping methods and removed without a trace
+class HostTimers:
+    def __init__(self):
+        self.totals = {}  # Timer name -> [calls, seconds]
+        self._wrapped = []  # (owner, attribute, previous value or None if it was not an instance attribute)
+
+    def _timed(self, function, name):
+        """Return function wrapped to add its calls and time to the named timer."""
+        entry = self.totals.setdefault(name, [0, 0.0])
+        clock = time.perf_counter
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                entry[0] += 1
+                entry[1] += clock() - start
+        return timed
+
+    def wrap(self, owner, attribute, name):
+        """Time every call of owner.attribute under name until unwrap_all()."""
+        previous = owner.__dict__.get(attribute)
+        self._wrapped.append((owner, attribute, previous))
+        setattr(owner, attribute, self._timed(getattr(owner, attribute), name))
+
+    def wrap_stages(self, pipeline):
+        """Time Pipeline.perform_stage separately for each stage."""
+        previous = pipeline.__dict__.get("perform_stage")
+        self._wrapped.append((pipeline, "perform_stage", previous))
+        perform_stage = pipeline.perform_stage
+        stages = {}
+        def timed(stage, decoded):
+            function = stages.get(stage)
+            if function is None:
+                function = stages[stage] = self._timed(perform_stage, f"stage:{stage}")
+            return function(stage, decoded)
+        pipeline.perform_stage = timed
+
+    def wrap_alu(self, alu):
+        """Time the operations of one ALU instance; only plans decoded after this call use the timed operations."""
+        self._wrapped.append((alu, "OPERATIONS", alu.__dict__.get("OPERATIONS")))
+        alu.OPERATIONS = {op: self._timed(function, "alu") for op, function in alu.OPERATIONS.items()}
+
+    def instrument(self, control_unit, pipeline=None):
+        """Time decoding, flags, memory, logging and (if given) each pipeline stage of a machine."""
+        self.wrap_alu(control_unit.alu)
+        self.wrap(control_unit, "decode_instruction", "decode_instruction")
+        self.wrap(control_unit.flags, "set_flags", "flags")
+        self.wrap(control_unit.memory, "read", "memory.read")
+        self.wrap(control_unit.memory, "write", "memory.write")
+        self.wrap(logging.getLogger(), "handle", "logging")
+        if pipeline is not None:
+            self.wrap_stages(pipeline)
+
+    def unwrap_all(self):
+        """Remove every timing wrapper, newest first, restoring the original methods."""
+        for owner, attribute, previous in reversed(self._wrapped):
+            if previous is None:
+                owner.__dict__.pop(attribute, None)
+            else:
+                setattr(owner, attribute, previous)
+        self._wrapped = []
+
+    def reset(self):
+        """Zero every timer, keeping the wrappers installed."""
+        for entry in self.totals.values():
+            entry[0] = 0
+            entry[1] = 0.0
+
+    def report(self):
+        """Return [{name, calls, seconds, microseconds per call}] sorted by total time; timers are inclusive."""
+        rows = [{"name": name, "calls": calls, "seconds": round(seconds, 6), "us_per_call": round(seconds * 1e6 / calls, 3) if calls else 0.0}
+                for name, (calls, seconds) in self.totals.items()]
+        return sorted(rows, key=lambda row: -row["seconds"])
+
+def format_timers(rows):
+    """Format HostTimers.report() rows as a text table."""
+    lines = [f"{'subsystem':<24} {'calls':>10} {'seconds':>10} {'us/call':>9}"]
+    lines += [f"{row['name']:<24} {row['calls']:>10} {row['seconds']:>10.4f} {row['us_per_call']:>9.2f}" for row in rows]
+    return "\n".join(lines)
+
+def profile_call(function, path=None, limit=25):
+    """Run function under cProfile; returns (result, top functions by cumulative time as text), saving stats to path if given."""
+    profile = cProfile.Profile()
+    result = profile.runcall(function)
+    if path:
+        profile.dump_stats(path)
+    return result, format_stats(profile, limit)
+
+def format_stats(profile, limit=25):
+    """Return the top functions of a cProfile.Profile by cumulative time as text."""
+    output = io.StringIO()
+    pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
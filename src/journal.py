@@ -0,0 +1,69 @@
+from registers import FLAGS_SLOT
+from collections import deque
+
+DEFAULT_JOURNAL_DEPTH = 10000  # Instructions that can be stepped back
+
+# Undo record for one instruction: everything needed to return to the state before it
+class UndoRecord:
+    __slots__ = ("index", "state", "ports", "memory")
+
+    def __init__(self, index, state, ports):
+        self.index = index  # Instruction index to resume at after undoing
+        self.state = state  # Copy of the packed registers, segments and flags
+        self.ports = ports
+        self.memory = []  # (address, old value) for each memory write, in write order
+
+# Bounded ring buffer of undo records for a ControlUnit; the oldest records are dropped first
+class UndoJournal:
+    def __init__(self, control_unit, depth=DEFAULT_JOURNAL_DEPTH):
+        if depth <= 0:
+            raise ValueError(f"Journal depth must be positive, got {depth}")
+        self.control_unit = control_unit
+        self.records = deque(maxlen=depth)
+        self.current = None  # Record of the instruction being executed
+        memory = control_unit.memory
+        self._write = memory.write
+        read = memory.read
+        original = self._write
+        def write(physical_address, value):
+            if self.current is not None:
+                self.current.memory.append((physical_address, read(physical_address)))
+            original(physical_address, value)
+        memory.write = write  # Micro-ops look the method up on every call
+
+    def begin(self, index):
+        """Open the undo record for the instruction at index, before any of its stages run."""
+        control_unit = self.control_unit
+        control_unit.state[FLAGS_SLOT] = control_unit.flags.pack()
+        self.current = UndoRecord(index, control_unit.state[:], dict(control_unit.ports))
+        self.records.append(self.current)
+
+    def end(self):
+        """Close the current record once its instruction has finished."""
+        self.current = None
+
+    def step_back(self, count=1):
+        """Undo up to count instructions (including one left open by an error); returns the index to resume at, or None."""
+        control_unit = self.control_unit
+        index = None
+        for _ in range(min(count, len(self.records))):
+            record = self.records.pop()
+            for address, value in reversed(record.memory):
+                self._write(address, value)
+            control_unit.state[:] = record.state
+            control_unit.flags.unpack(record.state[FLAGS_SLOT])
+            control_unit.ports.clear()
+            control_unit.ports.update(record.ports)
+            index = record.index
+        self.current = None
+        control_unit.jump_to = None
+        control_unit.latch.clear()
+        return index
+
+    def clear(self):
+        """Forget every record, e.g. after a reset or a memory image load."""
+        self.records.clear()
+        self.current = None
+
+    def __len__(self):
+        return len(self.records)
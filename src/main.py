@@ -1,20 +1,16 @@
 import tkinter as tk
 from gui import ProcessorGUI
+from utils import get_log_file_path, setup_logging
 import logging
-import os
 
 # Set log file path to the same directory as the script
-script_dir = os.path.dirname(os.path.abspath(__file__))
-log_file_path = os.path.join(script_dir, 'processor.log')
+log_file_path = get_log_file_path()
 print(f"Log file will be saved at: {log_file_path}")
 
-# Configure logging with explicit file path and error handling
+# Configure logging with explicit file path and error handling; records are written by a
+# background thread and the file rotates by size. Log > Debug Log turns on the per-instruction state trace.
 try:
-    logging.basicConfig(
-        filename=log_file_path,
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s'
-    )
+    setup_logging(log_file_path, logging.INFO)
     logging.info("Logging initialized successfully")
 except Exception as e:
     print(f"Failed to initialize logging: {str(e)}")
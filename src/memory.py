@@ -1,21 +1,398 @@
-# Memory class to simulate a flat 128KB memory
+import mmap
+import os
+import sys
+
+PAGE_SHIFT = 12
+PAGE_SIZE = 1 << PAGE_SHIFT  # 4KB pages for dirty tracking
+
+def image_format(path):
+    """Pick the image format for a file: "hex" for .hex files, "bin" otherwise."""
+    return "hex" if path.lower().endswith(".hex") else "bin"
+
+def _readinto_fully(stream, view):
+    """Fill view from stream with readinto until it is full or the stream ends."""
+    total = 0
+    while total < len(view):
+        read = stream.readinto(view[total:])
+        if not read:
+            break
+        total += read
+    return total
+
+# Memory class to simulate a flat, byte-addressable 128KB memory
 class Memory:
     def __init__(self, size=0x20000):
-        self.memory = [0] * size  # Initialize 128KB memory
+        self.size = size
+        self.data = bytearray(size)  # Initialize 128KB memory
+        # Aligned 32-bit words are read and written through a word view of the same buffer
+        if sys.byteorder == 'little' and size % 4 == 0:
+            self.words = memoryview(self.data).cast('I')
+        else:
+            self.words = None
+        self.generation = 0  # Incremented on every write
+        self.page_generation = {}  # Page number -> generation of its last write
+        self.nonzero = set()  # Aligned addresses of non-zero words
+        self._sorted_nonzero = []  # Sorted copy of nonzero, rebuilt when the set changes
 
     def read(self, physical_address):
-        """Read 32-bit value from memory."""
-        if 0 <= physical_address < len(self.memory):
-            return self.memory[physical_address]
-        raise ValueError(f"Physical memory address {physical_address} is invalid (max: {len(self.memory)-1})")
+        """Read a 32-bit little-endian value from memory."""
+        if 0 <= physical_address <= self.size - 4:
+            if physical_address & 3 == 0 and self.words is not None:
+                return self.words[physical_address >> 2]
+            return int.from_bytes(self.data[physical_address:physical_address + 4], 'little')
+        raise ValueError(f"Physical memory address {physical_address} is invalid (max: {self.size - 4})")
 
     def write(self, physical_address, value):
-        """Write 32-bit value to memory."""
-        if 0 <= physical_address < len(self.memory):
-            self.memory[physical_address] = value & 0xFFFFFFFF
+        """Write a 32-bit little-endian value to memory."""
+        if 0 <= physical_address <= self.size - 4:
+            value &= 0xFFFFFFFF
+            self.generation += 1
+            if physical_address & 3 == 0 and self.words is not None:
+                self.words[physical_address >> 2] = value
+                self.page_generation[physical_address >> PAGE_SHIFT] = self.generation
+                if value:
+                    if physical_address not in self.nonzero:
+                        self.nonzero.add(physical_address)
+                        self._sorted_nonzero = None
+                elif physical_address in self.nonzero:
+                    self.nonzero.discard(physical_address)
+                    self._sorted_nonzero = None
+            else:
+                self.data[physical_address:physical_address + 4] = value.to_bytes(4, 'little')
+                self._mark_written(physical_address, 4)
         else:
-            raise ValueError(f"Physical memory address {physical_address} is invalid (max: {len(self.memory)-1})")
+            raise ValueError(f"Physical memory address {physical_address} is invalid (max: {self.size - 4})")
+
+    def _mark_written(self, start, length):
+        """Update page generations and the non-zero index after a write of length bytes."""
+        end = start + length
+        for page in range(start >> PAGE_SHIFT, ((end - 1) >> PAGE_SHIFT) + 1):
+            self.page_generation[page] = self.generation
+        first = start & ~3
+        stop = min(end, self.size - 3)
+        if len(self.nonzero) < (stop - first) >> 2:
+            self.nonzero.difference_update([address for address in self.nonzero if first <= address < stop])
+        else:
+            self.nonzero.difference_update(range(first, stop, 4))
+        self.nonzero.update(self._nonzero_in(first, stop))
+        self._sorted_nonzero = None
+
+    def _nonzero_in(self, first, stop):
+        """Yield aligned addresses in [first, stop) whose word is non-zero."""
+        if self.words is None:
+            for address in range(first, stop, 4):
+                if self.read(address):
+                    yield address
+            return
+        base = first >> 2
+        for index, value in enumerate(self.words[base:(stop + 3) >> 2]):
+            if value:
+                yield (base + index) << 2
+
+    def _check_range(self, physical_address, length):
+        """Raise ValueError unless [physical_address, physical_address + length) lies in memory."""
+        if physical_address < 0 or length < 0 or physical_address + length > self.size:
+            raise ValueError(f"Memory range 0x{physical_address:08X}+{length} is outside memory (size: 0x{self.size:X})")
+
+    def read_bytes(self, physical_address, length):
+        """Return a zero-copy view of length bytes of memory."""
+        self._check_range(physical_address, length)
+        return memoryview(self.data)[physical_address:physical_address + length]
+
+    def write_bytes(self, physical_address, data):
+        """Copy a bytes-like block into memory."""
+        data = memoryview(data).cast('B')
+        self._check_range(physical_address, len(data))
+        if not len(data):
+            return
+        self.generation += 1
+        self.data[physical_address:physical_address + len(data)] = data
+        self._mark_written(physical_address, len(data))
+
+    def load_stream(self, stream, physical_address, length):
+        """Read length bytes from a binary stream straight into memory; returns the bytes read."""
+        self._check_range(physical_address, length)
+        view = memoryview(self.data)[physical_address:physical_address + length]
+        total = _readinto_fully(stream, view)
+        if total:
+            self.generation += 1
+            self._mark_written(physical_address, total)
+        return total
+
+    def load_image(self, path, physical_address, fmt=None):
+        """Load a raw binary or hex image file at physical_address; returns the bytes loaded."""
+        fmt = fmt or image_format(path)
+        if fmt == "hex":
+            with open(path, "r") as f:
+                data = bytes.fromhex("".join(f.read().split()))
+            self.write_bytes(physical_address, data)
+            return len(data)
+        with open(path, "rb") as f:
+            length = os.fstat(f.fileno()).st_size
+            return self.load_stream(f, physical_address, length)
+
+    def dump_image(self, path, physical_address, length, fmt=None):
+        """Write length bytes of memory starting at physical_address to a raw binary or hex file."""
+        fmt = fmt or image_format(path)
+        view = self.read_bytes(physical_address, length)
+        if fmt == "hex":
+            with open(path, "w") as f:
+                for offset in range(0, length, 16):
+                    f.write(bytes(view[offset:offset + 16]).hex(' ') + "\n")
+        else:
+            with open(path, "wb") as f:
+                f.write(view)
+        return length
+
+    def nonzero_words(self):
+        """Yield (address, value) for every aligned 32-bit word that is not zero, in address order."""
+        if self._sorted_nonzero is None:
+            self._sorted_nonzero = sorted(self.nonzero)
+        for address in self._sorted_nonzero:
+            yield address, self.read(address)
+
+    def dirty_pages(self, since=0):
+        """Return the page numbers written after generation since."""
+        return sorted(page for page, generation in self.page_generation.items() if generation > since)
+
+    def page_range(self, page):
+        """Return the (start, end) byte addresses covered by a page."""
+        start = page << PAGE_SHIFT
+        return start, min(start + PAGE_SIZE, self.size)
 
     def compute_physical_address(self, segment_base, offset):
         """Compute physical address from segment base and offset."""
-        return (segment_base + offset) & 0xFFFFFFFF
\ No newline at end of file
+        return (segment_base + offset) & 0xFFFFFFFF
+
+    def fork(self):
+        """Return an independent copy of this memory (one copy of the 128KB buffer)."""
+        clone = Memory(self.size)
+        clone.restore(self)
+        return clone
+
+    def restore(self, other):
+        """Replace this memory's contents with other's, in place so existing views stay valid."""
+        if type(other) is not type(self) or other.size != self.size:
+            raise ValueError(f"Cannot restore {type(self).__name__} of size 0x{self.size:X} from {type(other).__name__} of size 0x{other.size:X}")
+        self.data[:] = other.data
+        self._restored_from(other)
+
+    def _restored_from(self, other):
+        """Mark every page either memory has written as dirty and copy other's non-zero index."""
+        touched = set(self.page_generation) | set(other.page_generation)
+        self.generation += 1
+        self.page_generation = dict.fromkeys(touched, self.generation)
+        self.nonzero = set(other.nonzero)
+        self._sorted_nonzero = None
+
+
+# Sparse memory covering the full 32-bit address space, allocating pages on first write
+class SparseMemory(Memory):
+    EXTENT_PAGES = 256  # Pages mapped at once when backed by a file (1MB)
+
+    def __init__(self, backing_file=None):
+        self.size = 1 << 32
+        self.pages = {}  # Page number -> page buffer
+        self.page_words = {}  # Page number -> 32-bit word view of the page
+        self._writable = {}  # Pages this memory owns (not shared with a fork) -> word view
+        self.generation = 0
+        self.page_generation = {}
+        self.nonzero = set()
+        self._sorted_nonzero = []
+        self._word_views = sys.byteorder == 'little'
+        self.backing_file = backing_file
+        self._file = None
+        self._maps = []  # mmap extents, each holding EXTENT_PAGES pages
+        self._free_slots = 0
+        if backing_file is not None:
+            self._file = open(backing_file, "w+b")
+
+    def _allocate(self, page):
+        """Allocate a zeroed page, on the Python heap or in the backing file."""
+        if self._file is None:
+            buffer = bytearray(PAGE_SIZE)
+        else:
+            if self._free_slots == 0:
+                offset = len(self._maps) * self.EXTENT_PAGES * PAGE_SIZE
+                self._file.truncate(offset + self.EXTENT_PAGES * PAGE_SIZE)
+                self._maps.append(mmap.mmap(self._file.fileno(), self.EXTENT_PAGES * PAGE_SIZE, offset=offset))
+                self._free_slots = self.EXTENT_PAGES
+            slot = self.EXTENT_PAGES - self._free_slots
+            self._free_slots -= 1
+            buffer = memoryview(self._maps[-1])[slot * PAGE_SIZE:(slot + 1) * PAGE_SIZE]
+        self.pages[page] = buffer
+        if self._word_views:
+            self.page_words[page] = memoryview(buffer).cast('I')
+        self._writable[page] = self.page_words.get(page)
+        return buffer
+
+    def _own(self, page):
+        """Return a page buffer this memory may write, allocating it or copying it if a fork shares it."""
+        buffer = self.pages.get(page)
+        if buffer is None:
+            return self._allocate(page)
+        if page not in self._writable:
+            buffer = bytearray(buffer)
+            self.pages[page] = buffer
+            if self._word_views:
+                self.page_words[page] = memoryview(buffer).cast('I')
+            self._writable[page] = self.page_words.get(page)
+        return buffer
+
+    def read_bytes(self, physical_address, length):
+        """Return a copy of length bytes, treating unallocated pages as zero."""
+        self._check_range(physical_address, length)
+        result = bytearray()
+        end = physical_address + length
+        while physical_address < end:
+            page = physical_address >> PAGE_SHIFT
+            start = physical_address & (PAGE_SIZE - 1)
+            chunk = min(end - physical_address, PAGE_SIZE - start)
+            buffer = self.pages.get(page)
+            result += buffer[start:start + chunk] if buffer is not None else bytes(chunk)
+            physical_address += chunk
+        return result
+
+    def write_bytes(self, physical_address, data):
+        """Copy a bytes-like block into memory, allocating the pages it touches."""
+        data = memoryview(data).cast('B')
+        self._check_range(physical_address, len(data))
+        if not len(data):
+            return
+        self.generation += 1
+        position = 0
+        address = physical_address
+        while position < len(data):
+            page = address >> PAGE_SHIFT
+            start = address & (PAGE_SIZE - 1)
+            chunk = min(len(data) - position, PAGE_SIZE - start)
+            buffer = self._own(page)
+            buffer[start:start + chunk] = data[position:position + chunk]
+            position += chunk
+            address += chunk
+        self._mark_written(physical_address, len(data))
+
+    def read(self, physical_address):
+        """Read a 32-bit little-endian value from memory."""
+        if 0 <= physical_address <= self.size - 4:
+            if physical_address & 3 == 0 and self._word_views:
+                words = self.page_words.get(physical_address >> PAGE_SHIFT)
+                return words[(physical_address & (PAGE_SIZE - 1)) >> 2] if words is not None else 0
+            return int.from_bytes(self.read_bytes(physical_address, 4), 'little')
+        raise ValueError(f"Physical memory address {physical_address} is invalid (max: {self.size - 4})")
+
+    def write(self, physical_address, value):
+        """Write a 32-bit little-endian value to memory."""
+        if 0 <= physical_address <= self.size - 4:
+            value &= 0xFFFFFFFF
+            self.generation += 1
+            if physical_address & 3 == 0 and self._word_views:
+                page = physical_address >> PAGE_SHIFT
+                words = self._writable.get(page)
+                if words is None:
+                    if not value and page not in self.pages:
+                        return  # Zero written to an untouched page changes nothing
+                    self._own(page)
+                    words = self.page_words[page]
+                words[(physical_address & (PAGE_SIZE - 1)) >> 2] = value
+                self.page_generation[page] = self.generation
+                if value:
+                    if physical_address not in self.nonzero:
+                        self.nonzero.add(physical_address)
+                        self._sorted_nonzero = None
+                elif physical_address in self.nonzero:
+                    self.nonzero.discard(physical_address)
+                    self._sorted_nonzero = None
+            else:
+                self.write_bytes(physical_address, value.to_bytes(4, 'little'))
+        else:
+            raise ValueError(f"Physical memory address {physical_address} is invalid (max: {self.size - 4})")
+
+    def _nonzero_in(self, first, stop):
+        """Yield aligned addresses in [first, stop) whose word is non-zero, skipping unallocated pages."""
+        for page in range(first >> PAGE_SHIFT, ((stop - 1) >> PAGE_SHIFT) + 1):
+            if page not in self.pages:
+                continue
+            page_start = page << PAGE_SHIFT
+            low = max(first, page_start)
+            high = min(stop, page_start + PAGE_SIZE)
+            words = self.page_words.get(page)
+            if words is None:
+                for address in range(low, high, 4):
+                    if int.from_bytes(self.pages[page][address - page_start:address - page_start + 4], 'little'):
+                        yield address
+                continue
+            base = (low - page_start) >> 2
+            for index, value in enumerate(words[base:(high - page_start + 3) >> 2]):
+                if value:
+                    yield low + (index << 2)
+
+    def load_stream(self, stream, physical_address, length):
+        """Read length bytes from a binary stream straight into memory pages; returns the bytes read."""
+        self._check_range(physical_address, length)
+        total = 0
+        address = physical_address
+        end = physical_address + length
+        while address < end:
+            page = address >> PAGE_SHIFT
+            start = address & (PAGE_SIZE - 1)
+            chunk = min(end - address, PAGE_SIZE - start)
+            buffer = self._own(page)
+            read = _readinto_fully(stream, memoryview(buffer)[start:start + chunk])
+            total += read
+            address += read
+            if read < chunk:
+                break
+        if total:
+            self.generation += 1
+            self._mark_written(physical_address, total)
+        return total
+
+    def fork(self):
+        """Return a heap-backed copy sharing this memory's pages until either side writes to them."""
+        clone = SparseMemory()
+        clone.restore(self)
+        return clone
+
+    def restore(self, other):
+        """Adopt other's pages copy-on-write, in place so closures over this memory stay valid."""
+        if not isinstance(other, SparseMemory):
+            raise ValueError(f"Cannot restore SparseMemory from {type(other).__name__}")
+        pages = {}
+        for page, buffer in other.pages.items():
+            if isinstance(buffer, memoryview):
+                buffer = bytearray(buffer)  # Pages in a backing file are copied rather than shared
+            else:
+                other._writable.pop(page, None)
+            pages[page] = buffer
+        self._release_views()
+        self.pages = pages
+        self.page_words = {page: memoryview(buffer).cast('I') for page, buffer in pages.items()} if self._word_views else {}
+        self._writable = {}
+        self._restored_from(other)
+
+    def _release_views(self):
+        """Release the word views and file-backed page views held by this memory."""
+        for view in self.page_words.values():
+            view.release()
+        for buffer in self.pages.values():
+            if isinstance(buffer, memoryview):
+                buffer.release()
+
+    def allocated_bytes(self):
+        """Return the number of bytes held by allocated pages."""
+        return len(self.pages) * PAGE_SIZE
+
+    def close(self):
+        """Release page views and unmap the backing file."""
+        self._release_views()
+        self.page_words = {}
+        self.pages = {}
+        self._writable = {}
+        for extent in self._maps:
+            extent.close()
+        self._maps = []
+        self._free_slots = 0
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,158 @@
+from bisect import bisect_left
+import tkinter as tk
+
+NONZERO = "Non-zero"  # Rows are the non-zero words, in address order
+ALL_WORDS = "All words"  # Rows are consecutive words from the top address
+VIEW_MODES = (NONZERO, ALL_WORDS)
+HEADING_HEIGHT = 25  # Pixels taken by the Treeview headings when computing visible rows
+DEFAULT_ROW_HEIGHT = 20
+
+# Virtualized memory table: a fixed pool of Treeview rows shows a window onto memory and only changed rows are rewritten
+class MemoryViewer:
+    def __init__(self, tree, scrollbar, rows=12):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.mode = NONZERO
+        self.top = 0  # First row: index into addresses (NONZERO) or a word address (ALL_WORDS)
+        self.memory = None
+        self.generation = -1  # Memory generation the address index reflects
+        self.addresses = []  # Sorted aligned addresses of non-zero words
+        self.items = []  # Treeview item per visible row
+        self.shown = []  # Values currently displayed per row
+        self.highlight = None  # Address selected by goto()
+        self.selected = ()  # Items currently selected for the highlight
+        self.row_height = DEFAULT_ROW_HEIGHT
+        self.set_rows(rows)
+        scrollbar.config(command=self.yview)
+        tree.bind("<MouseWheel>", lambda e: self._scroll(-1 if e.delta > 0 else 1, "units"))
+        tree.bind("<Button-4>", lambda e: self._scroll(-1, "units"))
+        tree.bind("<Button-5>", lambda e: self._scroll(1, "units"))
+        tree.bind("<Configure>", self._resized)
+
+    def set_rows(self, rows):
+        """Grow or shrink the pool of Treeview rows."""
+        rows = max(1, rows)
+        while len(self.items) < rows:
+            self.items.append(self.tree.insert("", "end", values=("", "", "", "")))
+            self.shown.append(("", "", "", ""))
+        while len(self.items) > rows:
+            self.tree.delete(self.items.pop())
+            self.shown.pop()
+
+    def _resized(self, event):
+        """Match the row pool to the height of the tree."""
+        rows = (event.height - HEADING_HEIGHT) // self.row_height
+        if rows != len(self.items) and rows > 0:
+            self.set_rows(rows)
+            self.render()
+
+    def show(self, memory, dirty_pages=None):
+        """Display memory; dirty_pages lists the pages changed since the memory shown last if it is a different copy."""
+        if memory is not self.memory:
+            if self.memory is None or dirty_pages is None:
+                self.addresses = sorted(memory.nonzero)
+            else:
+                self._reindex(memory, dirty_pages)
+            self.memory = memory
+        elif memory.generation != self.generation:
+            self._reindex(memory, memory.dirty_pages(self.generation))
+        self.generation = memory.generation
+        self.render()
+
+    def _reindex(self, memory, pages):
+        """Rebuild the address index only over the given pages."""
+        addresses = self.addresses
+        nonzero = memory.nonzero
+        for page in pages:
+            start, end = memory.page_range(page)
+            low = bisect_left(addresses, start)
+            high = bisect_left(addresses, end, low)
+            addresses[low:high] = [address for address in range(start, min(end, memory.size - 3), 4) if address in nonzero]
+
+    def _total(self):
+        """Return the number of rows the current mode can show."""
+        if self.mode == NONZERO:
+            return len(self.addresses)
+        return self.memory.size >> 2 if self.memory is not None else 0
+
+    def _clamp(self, top):
+        """Keep the first row within range, and word aligned in ALL_WORDS mode."""
+        rows = len(self.items)
+        if self.mode == NONZERO:
+            return max(0, min(top, len(self.addresses) - rows))
+        size = self.memory.size if self.memory is not None else 0
+        return max(0, min(top & ~3, size - rows * 4))
+
+    def render(self):
+        """Write the visible rows, touching only the Treeview items whose values changed."""
+        memory = self.memory
+        if memory is None:
+            return
+        self.top = self._clamp(self.top)
+        rows = len(self.items)
+        if self.mode == NONZERO:
+            addresses = self.addresses[self.top:self.top + rows]
+        else:
+            addresses = range(self.top, min(self.top + rows * 4, memory.size - 3), 4)
+        read = memory.read
+        tree = self.tree
+        for row, item in enumerate(self.items):
+            if row < len(addresses):
+                addr = addresses[row]
+                val = read(addr)
+                values = (str(addr), f"0x{addr:08X}", str(val), f"0x{val:08X}")
+            else:
+                values = ("", "", "", "")
+            if values != self.shown[row]:
+                tree.item(item, values=values)
+                self.shown[row] = values
+        selected = tuple(self.items[row] for row, addr in enumerate(addresses) if addr == self.highlight)
+        if selected != self.selected:
+            tree.selection_set(selected)
+            self.selected = selected
+        total = self._total()
+        if self.mode == NONZERO:
+            first, last = (self.top / total, (self.top + rows) / total) if total > rows else (0.0, 1.0)
+        else:
+            first, last = (self.top >> 2) / total, ((self.top >> 2) + rows) / total
+        self.scrollbar.set(first, min(last, 1.0))
+
+    def _scroll(self, amount, what):
+        """Scroll by rows ("units") or visible windows ("pages")."""
+        step = amount * (len(self.items) if what == "pages" else 1)
+        self.top = self._clamp(self.top + (step * 4 if self.mode == ALL_WORDS else step))
+        self.render()
+        return "break"
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", amount, "units"/"pages")."""
+        if args[0] == tk.MOVETO:
+            position = int(float(args[1]) * self._total())
+            self.top = self._clamp(position * 4 if self.mode == ALL_WORDS else position)
+            self.render()
+        elif args[0] == tk.SCROLL:
+            self._scroll(int(args[1]), args[2])
+
+    def set_mode(self, mode):
+        """Switch between NONZERO and ALL_WORDS, keeping the top address in view where possible."""
+        if mode not in VIEW_MODES:
+            raise ValueError(f"Unknown memory view mode {mode}")
+        if mode == self.mode:
+            return
+        address = self._top_address()
+        self.mode = mode
+        self.top = address if mode == ALL_WORDS else bisect_left(self.addresses, address)
+        self.render()
+
+    def _top_address(self):
+        """Return the address shown in the first row."""
+        if self.mode == ALL_WORDS:
+            return self.top
+        return self.addresses[self.top] if self.top < len(self.addresses) else 0
+
+    def goto(self, address):
+        """Scroll so address (or, in NONZERO mode, the next non-zero word) is the first row and select it."""
+        address &= ~3
+        self.highlight = address
+        self.top = address if self.mode == ALL_WORDS else bisect_left(self.addresses, address)
+        self.render()
@@ -0,0 +1,235 @@
+from operation import Operation
+from registers import REGISTER_SLOTS, SEGMENT_SLOTS
+
+SP_SLOT = REGISTER_SLOTS['SP']
+DS_SLOT = SEGMENT_SLOTS['DS']
+SS_SLOT = SEGMENT_SLOTS['SS']
+
+# Branch conditions evaluated against the current flags
+JUMP_CONDITIONS = {
+    Operation.JMP: lambda flags: True,
+    Operation.JE: lambda flags: flags.ZF,
+    Operation.JNE: lambda flags: not flags.ZF,
+    Operation.JG: lambda flags: not flags.CF and not flags.ZF,
+    Operation.JL: lambda flags: flags.CF,
+}
+
+# Pipeline latch carrying values between the stages of one instruction
+class Latch:
+    __slots__ = ("alu_result", "memory_result", "address")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Reset the latch for a new instruction."""
+        self.alu_result = None
+        self.memory_result = None
+        self.address = None
+
+# Per-stage micro-op plan compiled once for a decoded instruction
+class MicroOpPlan:
+    __slots__ = ("stages", "by_stage", "sequence", "describe")
+
+    def __init__(self, stages, describe):
+        self.stages = [stage for stage, ops in stages]  # Stages after Decode, in order
+        self.by_stage = {stage: tuple(ops) for stage, ops in stages}
+        self.sequence = tuple(op for stage, ops in stages for op in ops)  # All micro-ops, in order
+        self.describe = describe  # latch -> result string, formatted only on request
+
+def _reader(state, slot, imm):
+    """Return a callable fetching a register slot or an immediate operand."""
+    if slot is not None:
+        return lambda: state[slot]
+    return lambda: imm
+
+def _build_mov(cu, d):
+    state = cu.state
+    read1 = _reader(state, d.src1_slot, d.src1_imm)
+    dest = d.dest_slot
+    def execute(latch):
+        latch.alu_result = read1()
+    def writeback(latch):
+        state[dest] = latch.alu_result & 0xFFFFFFFF
+    return MicroOpPlan([("Execute", [execute]), ("Writeback", [writeback])],
+                       lambda latch: f"{d.op.value} {d.dest}, {d.src1}")
+
+def _build_alu(cu, d):
+    state = cu.state
+    flags = cu.flags
+    op = d.op
+    compute = cu.alu.OPERATIONS[op]
+    read1 = _reader(state, d.src1_slot, d.src1_imm)
+    dest = d.dest_slot
+    if op in (Operation.NOT, Operation.INC, Operation.DEC):
+        # Unary forms: the ALU ignores operand2, the flags see 1 for INC/DEC
+        flag_operand = 0 if op == Operation.NOT else 1
+        def execute(latch):
+            val1 = read1()
+            latch.alu_result = result = compute(val1, 0)
+            flags.set_flags(result, op, val1, flag_operand)
+        describe = lambda latch: f"{op.value} {d.dest}, {d.src1} -> {latch.alu_result}"
+    else:
+        read2 = _reader(state, d.src2_slot, d.src2_imm)
+        def execute(latch):
+            val1 = read1()
+            val2 = read2()
+            latch.alu_result = result = compute(val1, val2)
+            flags.set_flags(result, op, val1, val2)
+        describe = lambda latch: f"{op.value} {d.dest}, {d.src1}, {d.src2} -> {latch.alu_result}"
+    def writeback(latch):
+        state[dest] = latch.alu_result
+    return MicroOpPlan([("Execute", [execute]), ("Writeback", [writeback])], describe)
+
+def _build_cmp(cu, d):
+    state = cu.state
+    flags = cu.flags
+    compute = cu.alu.OPERATIONS[Operation.CMP]
+    read1 = _reader(state, d.src1_slot, d.src1_imm)
+    read2 = _reader(state, d.src2_slot, d.src2_imm)
+    def execute(latch):
+        val1 = read1()
+        val2 = read2()
+        latch.alu_result = result = compute(val1, val2)
+        flags.set_flags(result, Operation.CMP, val1, val2)
+    return MicroOpPlan([("Execute", [execute])],
+                       lambda latch: f"{d.op.value} {d.src1}, {d.src2}")
+
+def _build_load(cu, d):
+    state = cu.state
+    memory = cu.memory
+    offset = d.src1_imm
+    dest = d.dest_slot
+    def execute(latch):
+        latch.address = (state[DS_SLOT] + offset) & 0xFFFFFFFF
+    def memory_stage(latch):
+        latch.memory_result = memory.read(latch.address)
+    def writeback(latch):
+        state[dest] = latch.memory_result
+    return MicroOpPlan([("Execute", [execute]), ("Memory", [memory_stage]), ("Writeback", [writeback])],
+                       lambda latch: f"{d.op.value} {d.dest}, [DS:{offset}] -> {latch.memory_result} (phys: 0x{latch.address:08X})")
+
+def _build_store(cu, d):
+    state = cu.state
+    memory = cu.memory
+    offset = d.dest_imm
+    src = d.src1_slot
+    def execute(latch):
+        latch.address = (state[DS_SLOT] + offset) & 0xFFFFFFFF
+    def memory_stage(latch):
+        memory.write(latch.address, state[src])
+    return MicroOpPlan([("Execute", [execute]), ("Memory", [memory_stage])],
+                       lambda latch: f"{d.op.value} [DS:{offset}], {d.src1} (phys: 0x{latch.address:08X})")
+
+def _build_movseg(cu, d):
+    state = cu.state
+    base = d.src1_imm
+    dest = d.dest_slot
+    def execute(latch):
+        latch.alu_result = base
+    def writeback(latch):
+        state[dest] = latch.alu_result & 0xFFFFFFFF
+    return MicroOpPlan([("Execute", [execute]), ("Writeback", [writeback])],
+                       lambda latch: f"{d.op.value} {d.dest}, {d.src1}")
+
+def _build_push(cu, d):
+    state = cu.state
+    memory = cu.memory
+    read1 = _reader(state, d.src1_slot, d.src1_imm)
+    def execute(latch):
+        latch.address = (state[SS_SLOT] + state[SP_SLOT] - 4) & 0xFFFFFFFF
+        latch.alu_result = read1()
+    def memory_stage(latch):
+        memory.write(latch.address, latch.alu_result)
+        state[SP_SLOT] = (state[SP_SLOT] - 4) & 0xFFFFFFFF
+    return MicroOpPlan([("Execute", [execute]), ("Memory", [memory_stage])],
+                       lambda latch: f"{d.op.value} {d.src1} (addr: 0x{latch.address:08X})")
+
+def _build_pop(cu, d):
+    state = cu.state
+    memory = cu.memory
+    dest = d.dest_slot
+    def execute(latch):
+        latch.address = (state[SS_SLOT] + state[SP_SLOT]) & 0xFFFFFFFF
+    def memory_stage(latch):
+        latch.memory_result = memory.read(latch.address)
+    def writeback(latch):
+        sp = state[SP_SLOT]
+        state[dest] = latch.memory_result
+        state[SP_SLOT] = (sp + 4) & 0xFFFFFFFF
+    return MicroOpPlan([("Execute", [execute]), ("Memory", [memory_stage]), ("Writeback", [writeback])],
+                       lambda latch: f"{d.op.value} {d.dest} <- [{latch.address}] {latch.memory_result}")
+
+def _build_in(cu, d):
+    state = cu.state
+    ports = cu.ports
+    port = d.src1_imm
+    dest = d.dest_slot
+    def execute(latch):
+        latch.alu_result = ports.get(port, 0)
+    def writeback(latch):
+        state[dest] = latch.alu_result & 0xFFFFFFFF
+    return MicroOpPlan([("Execute", [execute]), ("Writeback", [writeback])],
+                       lambda latch: f"{d.op.value} {d.dest}, port {d.src1} -> {latch.alu_result}")
+
+def _build_out(cu, d):
+    state = cu.state
+    ports = cu.ports
+    port = d.dest_imm
+    src = d.src1_slot
+    def execute(latch):
+        ports[port] = state[src]
+    return MicroOpPlan([("Execute", [execute]), ("Memory", [])],
+                       lambda latch: f"{d.op.value} {d.src1}, port {d.dest}")
+
+def _build_jump(cu, d):
+    flags = cu.flags
+    condition = JUMP_CONDITIONS[d.op]
+    target = d.target
+    def execute(latch):
+        latch.alu_result = taken = condition(flags)
+        if taken:
+            cu.jump_to = target
+    return MicroOpPlan([("Execute", [execute])],
+                       lambda latch: f"{d.op.value} {d.dest} {'taken' if latch.alu_result else 'not taken'}")
+
+def _build_fault(cu, d):
+    fault = d.fault
+    def execute(latch):
+        raise ValueError(fault)
+    return MicroOpPlan([("Execute", [execute])], lambda latch: fault)
+
+PLAN_BUILDERS = {
+    Operation.MOV: _build_mov,
+    Operation.ADD: _build_alu,
+    Operation.SUB: _build_alu,
+    Operation.AND: _build_alu,
+    Operation.OR: _build_alu,
+    Operation.XOR: _build_alu,
+    Operation.SHL: _build_alu,
+    Operation.SHR: _build_alu,
+    Operation.ROL: _build_alu,
+    Operation.ROR: _build_alu,
+    Operation.NOT: _build_alu,
+    Operation.INC: _build_alu,
+    Operation.DEC: _build_alu,
+    Operation.CMP: _build_cmp,
+    Operation.LOAD: _build_load,
+    Operation.STORE: _build_store,
+    Operation.MOVSEG: _build_movseg,
+    Operation.PUSH: _build_push,
+    Operation.POP: _build_pop,
+    Operation.IN: _build_in,
+    Operation.OUT: _build_out,
+    Operation.JMP: _build_jump,
+    Operation.JE: _build_jump,
+    Operation.JNE: _build_jump,
+    Operation.JG: _build_jump,
+    Operation.JL: _build_jump,
+}
+
+def compile_plan(control_unit, decoded):
+    """Compile a decoded instruction into its per-stage micro-op plan."""
+    if decoded.fault is not None:
+        return _build_fault(control_unit, decoded)
+    return PLAN_BUILDERS[decoded.op](control_unit, decoded)
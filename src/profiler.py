@@ -0,0 +1,104 @@
+from operation import Operation
+from microcode import JUMP_CONDITIONS
+from functools import partial
+
+JUMPS = (Operation.JMP, Operation.JE, Operation.JNE, Operation.JG, Operation.JL)
+START_REGION = "(start)"  # Region of instructions before the first label
+
+# Execution counters for a guest program, aggregated by instruction, label region, opcode and jump
+class GuestProfiler:
+    def __init__(self, program):
+        self.program = program
+        self.counts = [0] * len(program)  # Executions per instruction index, outside compiled blocks
+        self.taken = [0] * len(program)  # Taken branches per jump instruction index, outside compiled blocks
+        self.block_runs = [0] * len(program)  # Runs per compiled block start index
+        self.block_taken = [0] * len(program)  # Runs per block start that left through the block's final jump
+        self.block_lengths = {}  # Compiled block start -> length, for blocks registered by add_blocks()
+        self.block_targets = [None] * len(program)  # Block start -> index the block returns only when its final jump is taken
+        self.block_conditions = [None] * len(program)  # Block start -> callable telling whether a jump to the next instruction was taken
+
+    def add_blocks(self, blocks, flags):
+        """Register compiled blocks; the runner then counts their runs in block_runs and block_taken by start index."""
+        for start, block in blocks.items():
+            self.block_lengths[start] = block.length
+            last = start + block.length - 1
+            decoded = self.program.decoded[last]
+            if decoded.op not in JUMPS:
+                continue
+            if decoded.op == Operation.JMP or decoded.target != last + 1:
+                self.block_targets[start] = decoded.target
+            else:
+                # Both outcomes continue at the next instruction; the flags the block left decide which one it was
+                self.block_conditions[start] = partial(JUMP_CONDITIONS[decoded.op], flags)
+
+    def record_partial(self, start, executed):
+        """Count the instructions a faulting block completed before the fault."""
+        for index in range(start, start + executed):
+            self.counts[index] += 1
+
+    def instruction_counts(self):
+        """Return executions per instruction index, including compiled block runs."""
+        counts = list(self.counts)
+        block_runs = self.block_runs
+        running = 0
+        ends = {}  # Index -> runs of the blocks ending just before it
+        for index in range(len(counts)):
+            running -= ends.pop(index, 0)
+            runs = block_runs[index]
+            if runs:
+                running += runs
+                end = index + self.block_lengths[index]
+                ends[end] = ends.get(end, 0) + runs
+            counts[index] += running
+        return counts
+
+    def taken_counts(self):
+        """Return taken branches per jump instruction index, including compiled block runs."""
+        taken = list(self.taken)
+        for start, length in self.block_lengths.items():
+            taken[start + length - 1] += self.block_taken[start]
+        return taken
+
+    def regions(self):
+        """Return [(name, first index, end index)] for the label regions of the program."""
+        by_index = {}
+        for label, index in self.program.labels.items():
+            by_index.setdefault(index, []).append(label)
+        starts = sorted(by_index)
+        regions = []
+        if not starts or starts[0] > 0:
+            regions.append((START_REGION, 0, starts[0] if starts else len(self.program)))
+        for position, index in enumerate(starts):
+            end = starts[position + 1] if position + 1 < len(starts) else len(self.program)
+            regions.append(("/".join(sorted(by_index[index])), index, end))
+        return regions
+
+    def report(self, top=20):
+        """Return the profile as a JSON-serializable dict; top limits the hottest-instruction list."""
+        program = self.program
+        counts = self.instruction_counts()
+        taken = self.taken_counts()
+        total = sum(counts)
+        opcodes = {}
+        jumps = []
+        for index, count in enumerate(counts):
+            decoded = program.decoded[index]
+            if decoded is None:
+                continue
+            if count:
+                opcodes[decoded.op.name] = opcodes.get(decoded.op.name, 0) + count
+            if decoded.op in JUMPS and decoded.fault is None:
+                jumps.append({"index": index, "instruction": decoded.text, "taken": taken[index], "not_taken": count - taken[index]})
+        hottest = sorted(range(len(counts)), key=lambda index: -counts[index])[:top]
+        return {
+            "total": total,
+            "instructions": [{"index": index, "instruction": program.instructions[index], "count": counts[index]} for index in hottest if counts[index]],
+            "labels": {name: sum(counts[start:end]) for name, start, end in self.regions()},
+            "opcodes": dict(sorted(opcodes.items(), key=lambda item: -item[1])),
+            "jumps": jumps,
+        }
+
+    def reset(self):
+        """Zero every counter in place, so a runner holding the lists keeps counting into them."""
+        for counters in (self.counts, self.taken, self.block_runs, self.block_taken):
+            counters[:] = [0] * len(self.program)
@@ -0,0 +1,84 @@
+from utils import parse_program_lines
+from microcode import compile_plan
+
+# Decoded instruction with operands resolved to registers or parsed immediates
+class DecodedInstruction:
+    __slots__ = ("text", "op", "dest", "src1", "src2", "src1_reg", "src1_imm", "src2_reg", "src2_imm", "dest_imm", "target", "fault", "plan", "dest_slot", "src1_slot", "src2_slot", "control_unit")
+
+    def __init__(self, text, op, dest, src1, src2):
+        self.text = text
+        self.op = op
+        self.dest = dest
+        self.src1 = src1
+        self.src2 = src2
+        self.src1_reg = None  # Register name when src1 is a register
+        self.src1_imm = None  # Parsed immediate, offset or port for src1
+        self.src2_reg = None
+        self.src2_imm = None
+        self.dest_imm = None  # Parsed offset or port when dest is not a register
+        self.target = None  # Instruction index for jumps
+        self.fault = None  # Operand error raised when the instruction executes
+        self.plan = None  # MicroOpPlan compiled by the control unit
+        self.dest_slot = None  # State slot of the destination register or segment
+        self.src1_slot = None  # State slot of a register src1
+        self.src2_slot = None
+        self.control_unit = None  # Control unit the plan is built for on first use, when bind() left it unbuilt
+
+    def bind(self, control_unit):
+        """Return a copy whose micro-op plan will run on control_unit, built the first time it is used; the decoded operands are shared as is."""
+        decoded = DecodedInstruction.__new__(DecodedInstruction)
+        decoded.text, decoded.op, decoded.dest, decoded.src1, decoded.src2 = self.text, self.op, self.dest, self.src1, self.src2
+        decoded.src1_reg, decoded.src1_imm, decoded.src2_reg, decoded.src2_imm = self.src1_reg, self.src1_imm, self.src2_reg, self.src2_imm
+        decoded.dest_imm, decoded.target, decoded.fault = self.dest_imm, self.target, self.fault
+        decoded.dest_slot, decoded.src1_slot, decoded.src2_slot = self.dest_slot, self.src1_slot, self.src2_slot
+        decoded.control_unit = control_unit  # plan stays unset until __getattr__ builds it
+        return decoded
+
+    def __getattr__(self, name):
+        # Only reached for slots that were never set: the plan of a bound copy is built on first use
+        if name != "plan" or self.control_unit is None:
+            raise AttributeError(name)
+        self.plan = plan = compile_plan(self.control_unit, self)
+        self.control_unit = None
+        return plan
+
+    def as_tuple(self):
+        """Return the (op, dest, src1, src2) form used by the original decoder."""
+        return self.op, self.dest, self.src1, self.src2
+
+# Program class holding the decoded form of a source text
+class Program:
+    def __init__(self, source, parsed=None):
+        self.source = source
+        # parsed is (instructions, labels, lines) when they come from an assembled object instead of the source
+        self.instructions, self.labels, self.lines = parsed if parsed is not None else parse_program_lines(source)
+        self.decoded = []
+        self.errors = {}  # Instruction index -> decode error message
+
+    def decode(self, control_unit):
+        """Decode every instruction once, keeping decode errors for when they are reached."""
+        self.decoded = []
+        self.errors = {}
+        for index, instruction in enumerate(self.instructions):
+            try:
+                self.decoded.append(control_unit.decode(instruction))
+            except ValueError as e:
+                self.decoded.append(None)
+                self.errors[index] = str(e)
+
+    def bind(self, control_unit):
+        """Return a Program for control_unit sharing this one's instructions, labels and decode errors; only the plans are rebuilt, lazily."""
+        program = Program(self.source, (self.instructions, self.labels, self.lines))
+        program.decoded = [decoded.bind(control_unit) if decoded is not None else None for decoded in self.decoded]
+        program.errors = self.errors
+        return program
+
+    def fetch(self, index):
+        """Return the decoded instruction at index, raising its decode error if it had one."""
+        decoded = self.decoded[index]
+        if decoded is None and index in self.errors:
+            raise ValueError(self.errors[index])
+        return decoded
+
+    def __len__(self):
+        return len(self.instructions)
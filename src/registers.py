@@ -1,46 +1,84 @@
 from alu import Operation
 from flags import Flags
+from array import array
+
+# Fixed slot layout of the packed machine state
+REGISTER_NAMES = [f'R{i}' for i in range(8)] + ['SP']
+SEGMENT_NAMES = ['CS', 'DS', 'ES', 'SS', 'FS', 'GS']
+REGISTER_SLOTS = {name: slot for slot, name in enumerate(REGISTER_NAMES)}  # R0-R7 -> 0-7, SP -> 8
+SEGMENT_SLOTS = {name: slot for slot, name in enumerate(SEGMENT_NAMES, len(REGISTER_NAMES))}  # CS-GS -> 9-14
+FLAGS_SLOT = len(REGISTER_NAMES) + len(SEGMENT_NAMES)  # ZF, SF, CF, OF packed as bits 0-3
+STATE_SLOTS = FLAGS_SLOT + 1
+STATE_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+def new_state():
+    """Create a zeroed packed machine state of unsigned 32-bit slots."""
+    return array(STATE_TYPECODE, bytes(STATE_SLOTS * array(STATE_TYPECODE).itemsize))
+
+# Name-keyed view over a group of state slots, so registers['R0'] keeps working
+class SlotMap:
+    def __init__(self, state, slots):
+        self.state = state
+        self.slots = slots
+
+    def __getitem__(self, name):
+        return self.state[self.slots[name]]
+
+    def __setitem__(self, name, value):
+        self.state[self.slots[name]] = value & 0xFFFFFFFF
+
+    def __contains__(self, name):
+        return name in self.slots
+
+    def __iter__(self):
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def keys(self):
+        return self.slots.keys()
+
+    def items(self):
+        return [(name, self.state[slot]) for name, slot in self.slots.items()]
+
+    def values(self):
+        return [self.state[slot] for slot in self.slots.values()]
 
 # Register file class to manage general-purpose registers
 class RegisterFile:
-    def __init__(self):
-        self.registers = {f'R{i}': 0 for i in range(8)}  # R0-R7
-        self.registers['SP'] = 0  # Stack Pointer
+    def __init__(self, state=None):
+        self.state = state if state is not None else new_state()
+        self.registers = SlotMap(self.state, REGISTER_SLOTS)  # R0-R7 and SP (Stack Pointer)
 
     def read(self, reg):
         """Read value from a register."""
-        if reg in self.registers:
-            return self.registers[reg]
+        if reg in REGISTER_SLOTS:
+            return self.state[REGISTER_SLOTS[reg]]
         raise ValueError(f"Register {reg} does not exist")
 
     def write(self, reg, value):
         """Write value to a register, ensuring 32-bit bounds."""
-        if reg in self.registers:
-            self.registers[reg] = value & 0xFFFFFFFF
+        if reg in REGISTER_SLOTS:
+            self.state[REGISTER_SLOTS[reg]] = value & 0xFFFFFFFF
         else:
             raise ValueError(f"Register {reg} does not exist")
 
 # Segment Registers class to manage segment base addresses
 class SegmentRegisters:
-    def __init__(self):
-        self.segments = {
-            'CS': 0x00000000,  # Code Segment
-            'DS': 0x00000000,  # Data Segment
-            'ES': 0x00000000,  # Extra Segment
-            'SS': 0x00000000,  # Stack Segment
-            'FS': 0x00000000,  # Extra Segment
-            'GS': 0x00000000   # Extra Segment
-        }
+    def __init__(self, state=None):
+        self.state = state if state is not None else new_state()
+        self.segments = SlotMap(self.state, SEGMENT_SLOTS)  # CS, DS, ES, SS, FS, GS
 
     def get_base(self, seg):
         """Get base address of a segment."""
-        if seg in self.segments:
-            return self.segments[seg]
+        if seg in SEGMENT_SLOTS:
+            return self.state[SEGMENT_SLOTS[seg]]
         raise ValueError(f"Segment {seg} does not exist")
-    
+
     def set_base(self, seg, base):
         """Set base address of a segment, ensuring 32-bit bounds."""
-        if seg in self.segments:
-            self.segments[seg] = base & 0xFFFFFFFF
+        if seg in SEGMENT_SLOTS:
+            self.state[SEGMENT_SLOTS[seg]] = base & 0xFFFFFFFF
         else:
             raise ValueError(f"Segment {seg} does not exist")
\ No newline at end of file
@@ -0,0 +1,60 @@
+FRAME_MS = 16  # Longest a change waits before it is drawn
+
+# Coalesces widget updates: label texts, canvas fills and keyed refresh tasks are applied at most once per frame, and only when changed
+class RenderScheduler:
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self.texts = {}  # Widget -> text to apply
+        self.fills = {}  # (canvas, item) -> fill color to apply
+        self.tasks = {}  # Key -> callable to run; a later request for the same key replaces an earlier one
+        self.applied_texts = {}  # Widget -> text last applied
+        self.applied_fills = {}  # (canvas, item) -> fill last applied
+        self.frames = 0  # Flushes that applied at least one change
+        self._after_id = None
+
+    def _schedule(self):
+        """Arrange a flush for the next frame if none is pending."""
+        if self._after_id is None:
+            self._after_id = self.root.after(self.frame_ms, self.flush)
+
+    def set_text(self, widget, text):
+        """Show text in a label at the next frame, unless it is already shown."""
+        if self.applied_texts.get(widget) == text:
+            self.texts.pop(widget, None)
+            return
+        self.texts[widget] = text
+        self._schedule()
+
+    def set_fill(self, canvas, item, color):
+        """Fill a canvas item with color at the next frame, unless it already has it."""
+        key = (canvas, item)
+        if self.applied_fills.get(key) == color:
+            self.fills.pop(key, None)
+            return
+        self.fills[key] = color
+        self._schedule()
+
+    def call(self, key, callback):
+        """Run callback at the next frame, replacing any callback pending under the same key."""
+        self.tasks[key] = callback
+        self._schedule()
+
+    def flush(self):
+        """Apply every pending change now."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        texts, fills, tasks = self.texts, self.fills, self.tasks
+        if not (texts or fills or tasks):
+            return
+        self.texts, self.fills, self.tasks = {}, {}, {}
+        for widget, text in texts.items():
+            widget.config(text=text)
+            self.applied_texts[widget] = text
+        for (canvas, item), color in fills.items():
+            canvas.itemconfig(item, fill=color)
+            self.applied_fills[(canvas, item)] = color
+        for callback in tasks.values():
+            callback()
+        self.frames += 1
@@ -0,0 +1,172 @@
+from control_unit import ControlUnit
+from pipeline import Pipeline
+from compiler import BlockFault, compile_program
+import logging
+import time
+
+DEFAULT_MAX_INSTRUCTIONS = 10_000_000
+ENGINES = ("control", "pipeline", "compiled")
+TIME_CHECK_INTERVAL = 4096  # Instructions between checks of the time budget and the interrupt callback
+
+# Headless runner that executes a program without the GUI
+class Runner:
+    def __init__(self, source, engine="control", max_instructions=DEFAULT_MAX_INSTRUCTIONS, memory=None, trace=None, control_unit=None, time_limit=None, profiler=None, object_cache=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Engine {engine} is not supported (choose from {', '.join(ENGINES)})")
+        self.control_unit = control_unit if control_unit is not None else ControlUnit(memory, object_cache)
+        self.pipeline = Pipeline(self.control_unit)
+        self.program = self.control_unit.load_program(source)
+        self.engine = engine
+        self.max_instructions = max_instructions
+        self.time_limit = time_limit  # Seconds per run() call, or None for no limit
+        self.profiler = profiler  # GuestProfiler counting executed instructions, or None
+        self.trace = trace  # TraceWriter recording every executed instruction, or None
+        self.interrupt = None  # Callable polled with the time budget; returning True stops run() with status "interrupted"
+        self.executed = 0
+        self.index = 0  # Next instruction index; run() resumes from here
+        self.errors = []
+        self.status = "ready"
+
+    def _execute_control(self, decoded):
+        """Execute a decoded instruction through ControlUnit."""
+        self.control_unit.step(decoded)
+
+    def _execute_pipeline(self, decoded):
+        """Execute a decoded instruction through every Pipeline stage it uses."""
+        pipeline = self.pipeline
+        pipeline.clear_state()
+        pipeline.perform_stage("Fetch", None)
+        pipeline.perform_stage("Decode", decoded)
+        for stage in pipeline.get_remaining_stages(decoded):
+            pipeline.perform_stage(stage, decoded)
+
+    def _interpret(self, index, execute):
+        """Execute the instruction at index; returns the next index, or None after an execution error."""
+        program = self.program
+        try:
+            decoded = program.fetch(index)
+        except ValueError as e:
+            # Decode errors are reported and skipped, as in the GUI
+            self.errors.append({"index": index, "instruction": program.instructions[index], "error": str(e)})
+            return index + 1
+        if decoded is None:
+            return index + 1
+        trace = self.trace
+        if trace is not None:
+            trace.begin()
+        try:
+            execute(decoded)
+        except ValueError as e:
+            self.errors.append({"index": index, "instruction": decoded.text, "error": str(e)})
+            self.status = "error"
+            return None
+        if trace is not None:
+            trace.end(index, decoded.op)
+        self.executed += 1
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.counts[index] += 1
+        control_unit = self.control_unit
+        if control_unit.jump_to is not None:
+            if profiler is not None:
+                profiler.taken[index] += 1
+            index = control_unit.jump_to
+            control_unit.jump_to = None
+            return index
+        return index + 1
+
+    def run(self):
+        """Run until the program ends, an execution error occurs or the budget is spent."""
+        control_unit = self.control_unit
+        count = len(self.program)
+        execute = self._execute_pipeline if self.engine == "pipeline" else self._execute_control
+        blocks = compile_program(self.program).blocks if self.engine == "compiled" else {}
+        if self.trace is not None:
+            # Traces are recorded per instruction, so compiled blocks are interpreted instead
+            blocks = {}
+            if self.trace.control_unit is None:
+                self.trace.attach(control_unit)
+        block_args = (control_unit.state, control_unit.flags, control_unit.ports,
+                      control_unit.memory.read, control_unit.memory.write)
+        index = self.index
+        deadline = time.perf_counter() + self.time_limit if self.time_limit is not None else None
+        next_check = self.executed + TIME_CHECK_INTERVAL
+        interrupt = self.interrupt
+        checked = deadline is not None or interrupt is not None
+        profiler = self.profiler
+        if profiler is not None and blocks:
+            profiler.add_blocks(blocks, control_unit.flags)
+            block_runs, block_taken = profiler.block_runs, profiler.block_taken
+            block_targets, block_conditions = profiler.block_targets, profiler.block_conditions
+        self.status = "running"
+        while index < count:
+            remaining = self.max_instructions - self.executed
+            if remaining <= 0:
+                self.status = "budget_exhausted"
+                self.index = index
+                logging.info("Instruction budget of %d exhausted at index %d", self.max_instructions, index)
+                return self.status
+            if checked and self.executed >= next_check:
+                next_check = self.executed + TIME_CHECK_INTERVAL
+                if deadline is not None and time.perf_counter() >= deadline:
+                    self.status = "time_exhausted"
+                    self.index = index
+                    logging.info("Time limit of %ss exhausted at index %d", self.time_limit, index)
+                    return self.status
+                if interrupt is not None and interrupt():
+                    self.status = "interrupted"
+                    self.index = index
+                    return self.status
+            block = blocks.get(index)
+            if block is not None and block.length <= remaining:
+                try:
+                    next_index = block.function(*block_args)
+                except BlockFault as fault:
+                    self.executed += fault.executed
+                    if profiler is not None:
+                        profiler.record_partial(block.start, fault.executed)
+                    self.errors.append({"index": fault.index, "instruction": self.program.instructions[fault.index], "error": f"Execution error: {str(fault.error)}"})
+                    self.status = "error"
+                    self.index = fault.index
+                    return self.status
+                if profiler is not None:
+                    block_runs[index] += 1
+                    if next_index == block_targets[index]:
+                        block_taken[index] += 1
+                    elif block_conditions[index] is not None and block_conditions[index]():
+                        block_taken[index] += 1
+                index = next_index
+                self.executed += block.length
+                continue
+            # Interpreted engines, uncompiled instructions and the tail of the budget go one at a time
+            next_index = self._interpret(index, execute)
+            if next_index is None:
+                self.index = index
+                return self.status
+            index = next_index
+        self.status = "completed"
+        self.index = index
+        return self.status
+
+    def fork(self):
+        """Return a Runner continuing from this one's current point, sharing memory pages copy-on-write."""
+        clone = Runner(self.program.source, self.engine, self.max_instructions, control_unit=self.control_unit.fork())
+        clone.executed = self.executed
+        clone.index = self.index
+        clone.status = self.status
+        return clone
+
+    def machine_state(self):
+        """Return the final machine state as a JSON-serializable dict."""
+        control_unit = self.control_unit
+        return {
+            "status": self.status,
+            "engine": self.engine,
+            "executed": self.executed,
+            "registers": dict(control_unit.register_file.registers),
+            "segments": dict(control_unit.segment_regs.segments),
+            "flags": {flag: int(getattr(control_unit.flags, flag)) for flag in ['ZF', 'SF', 'CF', 'OF']},
+            "ports": {str(port): value for port, value in sorted(control_unit.ports.items())},
+            "memory": {f"0x{addr:08X}": val for addr, val in control_unit.memory.nonzero_words()},
+            "errors": self.errors,
+        }
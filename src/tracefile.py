@@ -0,0 +1,232 @@
+from operation import Operation
+from registers import REGISTER_NAMES, SEGMENT_NAMES, FLAGS_SLOT, STATE_SLOTS
+from bisect import bisect_right
+import mmap
+import struct
+
+# Binary trace layout (little-endian):
+#   header   TRACE_HEADER, then the comma-separated opcode names
+#   body     fixed-width ENTRY records: a STEP entry followed by its REG and MEM entries,
+#            and a CHECKPOINT entry followed by every state slot and non-zero memory word
+#   indexes  one file offset per STEP_STRIDE steps, then (step, offset) per checkpoint
+#   trailer  TRACE_TRAILER
+TRACE_MAGIC = b"PTRC"
+TRACE_END = b"PTRE"
+TRACE_VERSION = 1
+TRACE_HEADER = struct.Struct("<4sHHIH")  # magic, version, state slots, checkpoint interval, opcode names length
+TRACE_TRAILER = struct.Struct("<QQQQ4s")  # steps, step index offset, checkpoints, checkpoint index offset, magic
+ENTRY = struct.Struct("<BBHII")  # kind, a, b, c, d
+STEP, REG, MEM, CHECKPOINT = 1, 2, 3, 4
+STEP_STRIDE = 256  # Steps between entries of the step offset index
+DEFAULT_CHECKPOINT_INTERVAL = 65536
+SLOT_NAMES = REGISTER_NAMES + SEGMENT_NAMES + ['FLAGS']
+
+# Records executed instructions of a ControlUnit into a binary trace file
+class TraceWriter:
+    def __init__(self, path, checkpoint_interval=DEFAULT_CHECKPOINT_INTERVAL):
+        if checkpoint_interval <= 0:
+            raise ValueError(f"Checkpoint interval must be positive, got {checkpoint_interval}")
+        self.path = path
+        self.checkpoint_interval = checkpoint_interval
+        self.opcodes = {op: number for number, op in enumerate(Operation)}
+        names = ",".join(op.name for op in Operation).encode()
+        self.file = open(path, "wb", buffering=1 << 20)
+        self.file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, STATE_SLOTS, checkpoint_interval, len(names)))
+        self.file.write(names)
+        self.offset = TRACE_HEADER.size + len(names)
+        self.steps = 0
+        self.step_offsets = []  # File offset of every STEP_STRIDE-th step
+        self.checkpoints = []  # (step, file offset) of each checkpoint
+        self.control_unit = None
+        self._previous_write = None  # Instance attribute memory.write had before attach(), or None
+        self.before = None  # State slots copied by begin()
+        self.writes = []  # (address, value) memory writes of the current step
+
+    def attach(self, control_unit):
+        """Start recording memory writes of control_unit and write the initial checkpoint."""
+        self.control_unit = control_unit
+        memory = control_unit.memory
+        self._previous_write = memory.__dict__.get("write")
+        original = memory.write
+        writes = self.writes
+        def write(physical_address, value):
+            original(physical_address, value)
+            writes.append((physical_address, value & 0xFFFFFFFF))
+        memory.write = write  # Micro-ops look the method up on every call
+        self.checkpoint()
+
+    def detach(self):
+        """Stop recording memory writes."""
+        if self.control_unit is not None:
+            memory = self.control_unit.memory
+            if self._previous_write is not None:
+                memory.write = self._previous_write
+            else:
+                memory.__dict__.pop("write", None)
+            self._previous_write = None
+            self.control_unit = None
+
+    def checkpoint(self):
+        """Write the full state and non-zero memory so replay can start at the current step."""
+        control_unit = self.control_unit
+        state = control_unit.state_view()
+        words = list(control_unit.memory.nonzero_words())
+        self.checkpoints.append((self.steps, self.offset))
+        pack = ENTRY.pack
+        chunks = [pack(CHECKPOINT, 0, len(state), self.steps, len(words))]
+        chunks += [pack(REG, slot, 0, value, 0) for slot, value in enumerate(state)]
+        chunks += [pack(MEM, 0, 0, address, value) for address, value in words]
+        self.file.write(b"".join(chunks))
+        self.offset += ENTRY.size * len(chunks)
+
+    def begin(self):
+        """Copy the state before an instruction executes, writing a checkpoint when one is due."""
+        if self.steps % self.checkpoint_interval == 0 and self.checkpoints[-1][0] != self.steps:
+            self.checkpoint()
+        self.before = self.control_unit.state[:]
+        self.writes.clear()
+
+    def end(self, index, op):
+        """Record the instruction at index as executed, with the registers and memory it changed."""
+        if self.steps % STEP_STRIDE == 0:
+            self.step_offsets.append(self.offset)
+        control_unit = self.control_unit
+        state = control_unit.state
+        before = self.before
+        pack = ENTRY.pack
+        changes = [pack(REG, slot, 0, state[slot], 0) for slot in range(FLAGS_SLOT) if state[slot] != before[slot]]
+        changes += [pack(MEM, 0, 0, address, value) for address, value in self.writes]
+        self.file.write(pack(STEP, control_unit.flags.pack(), self.opcodes[op], index, len(changes)))
+        if changes:
+            self.file.write(b"".join(changes))
+        self.offset += ENTRY.size * (1 + len(changes))
+        self.steps += 1
+
+    def close(self):
+        """Write the indexes and trailer and close the file."""
+        if self.file.closed:
+            return
+        self.detach()
+        step_index = self.offset
+        self.file.write(struct.pack(f"<{len(self.step_offsets)}Q", *self.step_offsets))
+        checkpoint_index = step_index + 8 * len(self.step_offsets)
+        flat = [value for pair in self.checkpoints for value in pair]
+        self.file.write(struct.pack(f"<{len(flat)}Q", *flat))
+        self.file.write(TRACE_TRAILER.pack(self.steps, step_index, len(self.checkpoints), checkpoint_index, TRACE_END))
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+# Memory-mapped reader for trace files with indexed access to any step
+class TraceReader:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.map)
+        if len(self.map) < TRACE_HEADER.size + TRACE_TRAILER.size:
+            raise ValueError(f"{path} is not a trace file")
+        magic, version, slots, self.checkpoint_interval, names_length = TRACE_HEADER.unpack_from(self.map, 0)
+        if magic != TRACE_MAGIC or version != TRACE_VERSION or slots != STATE_SLOTS:
+            raise ValueError(f"{path} is not a version {TRACE_VERSION} trace file")
+        start = TRACE_HEADER.size
+        self.opcodes = bytes(self.map[start:start + names_length]).decode().split(",")
+        self.steps, step_index, checkpoints, checkpoint_index, end = TRACE_TRAILER.unpack_from(self.map, len(self.map) - TRACE_TRAILER.size)
+        if end != TRACE_END:
+            raise ValueError(f"Trace {path} was not closed; its index is missing")
+        self.step_offsets = self.view[step_index:checkpoint_index].cast("Q")
+        self.checkpoint_index = self.view[checkpoint_index:checkpoint_index + 16 * checkpoints].cast("Q")
+        self.checkpoint_steps = self.checkpoint_index[0::2]
+        self.checkpoint_offsets = self.checkpoint_index[1::2]
+
+    def __len__(self):
+        return self.steps
+
+    def _entries(self, offset, count):
+        """Unpack count consecutive entries starting at offset."""
+        return [ENTRY.unpack_from(self.map, offset + ENTRY.size * i) for i in range(count)]
+
+    def _step_offset(self, step):
+        """Return the file offset of a step by skipping forward from the nearest indexed step."""
+        if not 0 <= step < self.steps:
+            raise ValueError(f"Step {step} is out of range (trace has {self.steps} steps)")
+        offset = self.step_offsets[step // STEP_STRIDE]
+        for _ in range(step % STEP_STRIDE):
+            offset = self._skip(offset)
+        return offset
+
+    def _skip(self, offset):
+        """Return the offset just past the STEP (or CHECKPOINT and STEP) record at offset."""
+        kind, a, b, c, d = ENTRY.unpack_from(self.map, offset)
+        offset += ENTRY.size * (1 + d + (b if kind == CHECKPOINT else 0))
+        if kind == CHECKPOINT:
+            return self._skip(offset)
+        return offset
+
+    def _read_step(self, offset):
+        """Return (step record fields, changes, next offset), skipping a checkpoint in the way."""
+        kind, flags, opcode, index, count = ENTRY.unpack_from(self.map, offset)
+        if kind == CHECKPOINT:
+            return self._read_step(offset + ENTRY.size * (1 + opcode + count))
+        changes = self._entries(offset + ENTRY.size, count)
+        return (flags, opcode, index), changes, offset + ENTRY.size * (1 + count)
+
+    def step(self, step):
+        """Return the record of one executed instruction as a dict."""
+        (flags, opcode, index), changes, _ = self._read_step(self._step_offset(step))
+        return {
+            "step": step,
+            "index": index,
+            "op": self.opcodes[opcode],
+            "flags": {flag: (flags >> bit) & 1 for bit, flag in enumerate(['ZF', 'SF', 'CF', 'OF'])},
+            "registers": {SLOT_NAMES[a]: c for kind, a, b, c, d in changes if kind == REG},
+            "memory": [(c, d) for kind, a, b, c, d in changes if kind == MEM],
+        }
+
+    def steps_between(self, start, stop):
+        """Yield the records of steps in [start, stop)."""
+        if not 0 <= start <= self.steps:
+            raise ValueError(f"Step {start} is out of range (trace has {self.steps} steps)")
+        for step in range(start, min(stop, self.steps)):
+            yield self.step(step)
+
+    def state_at(self, step):
+        """Return (state slots, {address: value}) after the first step instructions have executed."""
+        if not 0 <= step <= self.steps:
+            raise ValueError(f"Step {step} is out of range (trace has {self.steps} steps)")
+        position = bisect_right(self.checkpoint_steps, step) - 1
+        current = self.checkpoint_steps[position]
+        offset = self.checkpoint_offsets[position]
+        kind, a, slots, _, words = ENTRY.unpack_from(self.map, offset)
+        entries = self._entries(offset + ENTRY.size, slots + words)
+        state = [entry[3] for entry in entries[:slots]]
+        memory = {entry[3]: entry[4] for entry in entries[slots:]}
+        offset += ENTRY.size * (1 + slots + words)
+        while current < step:
+            (flags, opcode, index), changes, offset = self._read_step(offset)
+            for kind, a, b, c, d in changes:
+                if kind == REG:
+                    state[a] = c
+                else:
+                    memory[c] = d
+            state[FLAGS_SLOT] = flags
+            current += 1
+        return state, {address: value for address, value in memory.items() if value}
+
+    def close(self):
+        """Release the memory map."""
+        self.step_offsets.release()
+        self.checkpoint_steps.release()
+        self.checkpoint_offsets.release()
+        self.checkpoint_index.release()
+        self.view.release()
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,7 +1,115 @@
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import atexit
 import logging
 import os
+import queue
+import re
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 5 * 1024 * 1024  # Rotate processor.log once it reaches 5 MB
+LOG_BACKUP_COUNT = 3
+LOG_QUEUE_SIZE = 10000  # Records waiting for the writer thread; DEBUG records beyond this are dropped
+_listener = None  # BlockingQueueListener writing log records on its own thread
 
 def get_log_file_path():
     """Get the path to the processor.log file."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    return os.path.join(script_dir, 'processor.log')
\ No newline at end of file
+    return os.path.join(script_dir, 'processor.log')
+
+# Queue handler that leaves formatting to the writer thread instead of the caller; when the
+# bounded queue is full, DEBUG records are dropped and higher levels wait for room
+class DeferredQueueHandler(QueueHandler):
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0  # DEBUG records dropped since the last one that was queued
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        block = record.levelno > logging.DEBUG
+        try:
+            if self.dropped:
+                self.queue.put(logging.LogRecord("root", logging.WARNING, __file__, 0, "Dropped %d DEBUG records while the log writer was behind",
+                                                 (self.dropped,), None), block)
+                self.dropped = 0
+            self.queue.put(record, block)
+        except queue.Full:
+            self.dropped += 1
+
+# Queue listener that waits for room for its stop sentinel; QueueListener puts it with put_nowait,
+# which fails on a full bounded queue and leaves the writer thread running with records unwritten
+class BlockingQueueListener(QueueListener):
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+# Log message built only when a handler formats the record
+class LazyMessage:
+    __slots__ = ("function", "args")
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __str__(self):
+        return self.function(*self.args)
+
+def setup_logging(log_file=None, level=logging.INFO, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT, queue_size=LOG_QUEUE_SIZE):
+    """Send log records through a queue to a background thread writing a size-rotated log file."""
+    global _listener
+    stop_logging()
+    handler = RotatingFileHandler(log_file or get_log_file_path(), maxBytes=max_bytes, backupCount=backup_count, delay=True)
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    log_queue = queue.Queue(queue_size)
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+        existing.close()
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(level)
+    _listener = BlockingQueueListener(log_queue, handler)
+    _listener.start()
+    return _listener
+
+def stop_logging():
+    """Write out queued records, then stop the background writer and close the log file."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(stop_logging)
+
+def strip_comment(line):
+    """Remove a trailing ; or // comment from a source line."""
+    return re.sub(r'\s*(;.*|//.*)$', '', line).strip()
+
+def parse_program(source):
+    """Split program text into instructions and a label -> index table."""
+    instructions, labels, _ = parse_program_lines(source)
+    return instructions, labels
+
+def parse_program_lines(source):
+    """Split program text into instructions, a label -> index table and the 1-based source line of each instruction."""
+    instructions = []
+    labels = {}
+    lines = []
+    for number, line in enumerate(source.splitlines(), 1):
+        line = strip_comment(line)
+        if not line:
+            continue
+        match = re.match(r'^\s*(\w+)\s*:\s*(.*)$', line)
+        if match:
+            label = match.group(1)
+            instruction = match.group(2).strip()
+            labels[label] = len(instructions)
+            if instruction:
+                instructions.append(instruction)
+                lines.append(number)
+        else:
+            instructions.append(line)
+            lines.append(number)
+    return instructions, labels, lines
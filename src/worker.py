@@ -0,0 +1,101 @@
+import queue
+import threading
+import time
+
+PUBLISH_INTERVAL = 1 / 30  # Seconds between state snapshots published while running
+
+# State snapshot published by an ExecutionWorker; memory is a private copy, replaced only after writes
+class RunUpdate:
+    __slots__ = ("state", "ports", "memory", "dirty_pages", "executed", "index", "status", "errors", "done")
+
+    def __init__(self, state, ports, memory, dirty_pages, executed, index, status, errors, done):
+        self.state = state  # Packed registers, segments and flags as a list
+        self.ports = ports
+        self.memory = memory
+        self.dirty_pages = dirty_pages  # Pages that differ from the memory of the previous update (or the run's start)
+        self.executed = executed
+        self.index = index  # Next instruction index; exact only once paused or done
+        self.status = status
+        self.errors = errors  # Errors reported since the previous update
+        self.done = done
+
+# Thread running a Runner in the background, publishing RunUpdates to a queue and honouring pause and stop requests
+class ExecutionWorker(threading.Thread):
+    def __init__(self, runner, profile=None):
+        super().__init__(name="pentaur-worker", daemon=True)
+        self.runner = runner
+        self.profile = profile  # cProfile.Profile enabled on this thread while it runs, or None
+        self.updates = queue.SimpleQueue()
+        self._running = threading.Event()
+        self._running.set()
+        self._stopping = threading.Event()
+        self._published = time.perf_counter()
+        self._published_errors = 0
+        self._memory = None  # Copy of memory in the last update and the generation it was taken at
+        self._generation = runner.control_unit.memory.generation
+        runner.interrupt = self._poll
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    def pause(self):
+        """Stop at the next poll and wait for resume() or stop()."""
+        self._running.clear()
+
+    def resume(self):
+        """Continue after pause()."""
+        self._running.set()
+
+    def stop(self):
+        """End the run at the next poll, paused or not; the final update has status "stopped"."""
+        self._stopping.set()
+        self._running.set()
+
+    def _poll(self):
+        """Publish a snapshot when one is due; returns True when the runner should stop for a pause or stop request."""
+        now = time.perf_counter()
+        if now - self._published >= PUBLISH_INTERVAL:
+            self._published = now
+            self._publish(False)
+        return not self._running.is_set() or self._stopping.is_set()
+
+    def _publish(self, done):
+        """Queue a snapshot of the machine, copying memory only if it changed since the last one."""
+        runner = self.runner
+        control_unit = runner.control_unit
+        memory = control_unit.memory
+        dirty_pages = ()
+        if memory.generation != self._generation or self._memory is None:
+            dirty_pages = memory.dirty_pages(self._generation)
+            self._memory = memory.fork()
+            self._generation = memory.generation
+        errors = runner.errors[self._published_errors:]
+        self._published_errors = len(runner.errors)
+        self.updates.put(RunUpdate(control_unit.state_view().tolist(), dict(control_unit.ports), self._memory, dirty_pages,
+                                   runner.executed, runner.index, runner.status, errors, done))
+
+    def run(self):
+        runner = self.runner
+        if self.profile is not None:
+            self.profile.enable()
+        try:
+            while True:
+                status = runner.run()
+                if status != "interrupted":
+                    break
+                if not self._running.is_set():
+                    self._publish(False)
+                    self._running.wait()
+                if self._stopping.is_set():
+                    runner.status = "stopped"
+                    break
+        except Exception as e:
+            # Anything unexpected ends the run like an execution error instead of killing the thread silently
+            runner.status = "error"
+            runner.errors.append({"index": runner.index, "instruction": "", "error": f"{type(e).__name__}: {str(e)}"})
+        finally:
+            if self.profile is not None:
+                self.profile.disable()
+            runner.interrupt = None
+            self._publish(True)
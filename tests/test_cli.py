@@ -0,0 +1,50 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from cli import main
+
+PROGRAM = """MOV R0, 3
+loop: DEC R0, R0
+CMP R0, 0
+JNE loop
+"""
+
+class TraceCommandTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        program = os.path.join(directory.name, "loop.asm")
+        with open(program, "w") as f:
+            f.write(PROGRAM)
+        self.trace = os.path.join(directory.name, "loop.trace")
+        self.assertEqual(self.run_cli("run", program, "--no-cache", "--trace", self.trace)[0], 0)
+        self.steps = json.loads(self.run_cli("trace", self.trace)[1])["steps"]
+
+    def run_cli(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(list(argv))
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def test_state_at_last_step(self):
+        code, stdout, _ = self.run_cli("trace", self.trace, "--state", str(self.steps))
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(stdout)["registers"]["R0"], 0)
+
+    def test_out_of_range_steps_are_errors(self):
+        for argv in (["--state", str(self.steps + 1)], ["--state", "-1"], ["--start", "-1", "--count", "2"]):
+            with self.subTest(argv=argv):
+                code, _, stderr = self.run_cli("trace", self.trace, *argv)
+                self.assertEqual(code, 1)
+                self.assertIn("out of range", stderr)
+                self.assertTrue(stderr.startswith("Error: "))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import utils
+
+class StopLoggingTest(unittest.TestCase):
+    def tearDown(self):
+        utils.stop_logging()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+
+    def test_stop_with_full_queue_writes_every_record(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "processor.log")
+        listener = utils.setup_logging(path, queue_size=4)
+        handler = listener.handlers[0]
+        held, gate = threading.Event(), threading.Event()
+        emit = handler.emit
+        def held_emit(record):
+            held.set()
+            gate.wait()
+            emit(record)
+        handler.emit = held_emit
+
+        # The writer holds the first record while the rest fill the queue
+        logging.info("Record %d", 0)
+        self.assertTrue(held.wait(5))
+        written = 1
+        while not listener.queue.full():
+            logging.info("Record %d", written)
+            written += 1
+        self.assertTrue(listener.queue.full())
+
+        threading.Timer(0.2, gate.set).start()
+        utils.stop_logging()
+        self.assertIsNone(listener._thread)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual([line.rsplit(" - ", 1)[1] for line in lines], [f"Record {n}" for n in range(written)])
+
+if __name__ == "__main__":
+    unittest.main()